@@ -0,0 +1,120 @@
+"""Measure `tutorial` start-up import time per subcommand.
+
+Runs each subcommand with ``python -X importtime`` against a throwaway
+tutorial and app dir, sums the self times of everything imported after the
+``tutorial_runner`` package (the best of several runs), and compares them with
+``startup-baseline.json``. Exits non-zero if any command got slower than the
+baseline by more than the allowed tolerance.
+
+    python benchmarks/startup.py            # compare against the baseline
+    python benchmarks/startup.py --update   # record a new baseline
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+BASELINE_PATH = Path(__file__).resolve().parent / "startup-baseline.json"
+SAMPLE_CONFIG = """\
+name = "Startup benchmark"
+
+[[parts]]
+id = 1
+name = "Part"
+dir = "part01"
+file = "work.py"
+
+  [[parts.lessons]]
+  id = 1
+  name = "Lesson"
+"""
+COMMANDS = {
+    "help": ["--help"],
+    "version": ["version"],
+    "status": ["status"],
+    "lesson": ["lesson"],
+}
+
+
+def import_profile(args, env, cwd, repeat=7):
+    """Return the best import time in ms and the modules imported by a command."""
+    best = None
+    modules = set()
+    for _ in range(repeat):
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", "-m", "tutorial_runner"] + args,
+            env=env,
+            cwd=cwd,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            universal_newlines=True,
+            check=True,
+        )
+        total = 0
+        counting = False
+        for line in completed.stderr.splitlines():
+            if not line.startswith("import time:") or "self [us]" in line:
+                continue
+            self_us, _, name = line[len("import time:"):].split("|")
+            if counting:
+                total += int(self_us)
+                modules.add(name.strip())
+            # Everything up to the package itself is interpreter start-up.
+            counting = counting or name.strip() == "tutorial_runner"
+        best = total if best is None else min(best, total)
+    return best / 1000.0, modules
+
+
+def profile_commands():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        tutorial_dir = Path(temp_dir, "tutorial")
+        (tutorial_dir / "part01").mkdir(parents=True)
+        (tutorial_dir / "tutorial.toml").write_text(SAMPLE_CONFIG)
+        env = dict(os.environ, XDG_CONFIG_HOME=str(Path(temp_dir, "config")))
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(ROOT), env.get("PYTHONPATH")]))
+        subprocess.run(
+            [sys.executable, "-m", "tutorial_runner", "init", "-r"],
+            env=env,
+            cwd=str(tutorial_dir),
+            stdout=subprocess.DEVNULL,
+            check=True,
+        )
+        return {
+            name: import_profile(args, env, str(tutorial_dir))
+            for name, args in COMMANDS.items()
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--update", action="store_true", help="Write a new baseline.")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=1.5,
+        help="Allowed slowdown factor against the baseline (default: 1.5).",
+    )
+    options = parser.parse_args()
+
+    results = {name: round(ms, 2) for name, (ms, _) in profile_commands().items()}
+    if options.update or not BASELINE_PATH.exists():
+        BASELINE_PATH.write_text(json.dumps(results, indent=2, sort_keys=True) + "\n")
+        print("Baseline written to {}".format(BASELINE_PATH))
+    baseline = json.loads(BASELINE_PATH.read_text())
+    failed = False
+    for name, ms in sorted(results.items()):
+        limit = baseline.get(name, ms) * options.tolerance
+        verdict = "ok" if ms <= limit else "REGRESSION"
+        failed = failed or ms > limit
+        print("{:10} {:8.2f} ms  (baseline {:8.2f} ms)  {}".format(name, ms, baseline.get(name, ms), verdict))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,216 @@
+"""Benchmark State and CLI hot paths on synthetic courses.
+
+Generates ``tutorial.toml`` files with 10, 1,000 and 10,000 lessons, then
+times the State API and full ``tutorial`` invocations through click's
+``CliRunner``. For every benchmark it records the best wall time, the peak
+traced memory and the state loads/saves counted by the profiler, and
+compares them with ``baseline.json``. A wall time only counts as a
+regression if it is both ``--tolerance`` times and ``--min-delta``
+milliseconds slower than the baseline, so sub-millisecond jitter is not
+reported. The state counters are deterministic and must match exactly,
+except the byte counts of ``tutorial check``, whose saved results include
+test durations.
+
+    python benchmarks/suite.py                  # compare against the baseline
+    python benchmarks/suite.py --update         # record a new baseline
+    python benchmarks/suite.py --sizes 10 1000  # only some course sizes
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from click.testing import CliRunner  # noqa: E402
+
+from tutorial_runner import cli  # noqa: E402
+from tutorial_runner.profiling import PROFILER  # noqa: E402
+from tutorial_runner.state import State  # noqa: E402
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+LESSONS_PER_PART = 50
+SIZES = (10, 1000, 10000)
+COUNTERS = ("state_loads", "state_saves", "state_bytes_read", "state_bytes_written")
+TIMED_RESULTS = ("tutorial check",)
+
+
+def write_course(tutorial_dir, lesson_count):
+    """Write a synthetic tutorial with ``lesson_count`` lessons and return its config path."""
+    lines = ['name = "Synthetic course with {} lessons"\n'.format(lesson_count)]
+    part_count = max(1, -(-lesson_count // LESSONS_PER_PART))
+    for part_id in range(1, part_count + 1):
+        part_dir = tutorial_dir / "part{:03d}".format(part_id)
+        (part_dir / "tests").mkdir(parents=True)
+        (part_dir / "solutions").mkdir()
+        (part_dir / "work.py").write_text("ANSWER = 42\n")
+        (part_dir / "tests" / "test_lesson.py").write_text(
+            "def test_lesson():\n    assert True\n"
+        )
+        lines.append(
+            '[[parts]]\nid = {0}\nname = "Part {0}"\ndir = "{1}"\nfile = "work.py"\n'.format(
+                part_id, part_dir.name
+            )
+        )
+        first = (part_id - 1) * LESSONS_PER_PART
+        for lesson_id in range(1, min(LESSONS_PER_PART, lesson_count - first) + 1):
+            lines.append(
+                '  [[parts.lessons]]\n  id = {0}\n  name = "Lesson {0}"\n'
+                '  test = "test_lesson.py"\n  objectives = "Do the thing."\n'.format(lesson_id)
+            )
+    config_path = tutorial_dir / "tutorial.toml"
+    config_path.write_text("\n".join(lines))
+    return config_path
+
+
+@contextlib.contextmanager
+def quiet_fds():
+    """Send output from forked pytest children to /dev/null."""
+    sys.stdout.flush()
+    saved = os.dup(1), os.dup(2)
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+    os.dup2(devnull, 2)
+    try:
+        yield
+    finally:
+        os.dup2(saved[0], 1)
+        os.dup2(saved[1], 2)
+        for fd in saved + (devnull,):
+            os.close(fd)
+
+
+def measure(function, repeat):
+    """Return best wall time (ms), peak traced memory (KB) and profiler counts."""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    PROFILER.start()
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    record = PROFILER.finish()
+    return {
+        "ms": round(best * 1000, 3),
+        "peak_kb": round(peak / 1024.0, 1),
+        "state_loads": record["phases"].get("state.load", {}).get("count", 0),
+        "state_saves": record["phases"].get("state.save", {}).get("count", 0),
+        "state_bytes_read": record["counters"].get("state.bytes_read", 0),
+        "state_bytes_written": record["counters"].get("state.bytes_written", 0),
+    }
+
+
+def benchmarks(config_path):
+    """Yield ``(name, function, repeat)`` for one synthetic course."""
+    runner = CliRunner()
+    State().initialize(str(config_path))
+    last_part = State().list_parts()[-1]
+    last = (last_part["id"], last_part["lessons"][-1]["id"])
+
+    def invoke(*args):
+        result = runner.invoke(cli.tutorial, list(args))
+        if result.exit_code != 0:
+            raise RuntimeError("tutorial {} failed:\n{}".format(" ".join(args), result.output))
+
+    def check():
+        State().set_current_lesson(1, 1)
+        with quiet_fds():
+            invoke("check", "--force")
+
+    yield "State.initialize", lambda: State().initialize(str(config_path)), 3
+    yield "State.get_current_lesson", lambda: State().get_current_lesson(), 5
+    yield "State.set_current_lesson", lambda: State().set_current_lesson(*last), 5
+    yield "State.complete_lesson", lambda: State().complete_lesson(1, 1), 5
+    yield "tutorial status", lambda: invoke("status"), 3
+    yield "tutorial lesson", lambda: invoke("lesson"), 3
+    yield "tutorial check", check, 3
+
+
+def run(sizes):
+    results = {}
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            os.environ["XDG_CONFIG_HOME"] = str(Path(temp_dir, "config"))
+            tutorial_dir = Path(temp_dir, "tutorial")
+            config_path = write_course(tutorial_dir, size)
+            cwd = os.getcwd()
+            os.chdir(str(tutorial_dir))
+            try:
+                for name, function, repeat in benchmarks(config_path):
+                    results["{} [{}]".format(name, size)] = measure(function, repeat)
+            finally:
+                os.chdir(cwd)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    parser.add_argument("--update", action="store_true", help="Write a new baseline.")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=1.5,
+        help="Allowed slowdown factor against the baseline (default: 1.5).",
+    )
+    parser.add_argument(
+        "--min-delta",
+        type=float,
+        default=2.0,
+        help="Milliseconds a benchmark must slow down by to count as a regression (default: 2).",
+    )
+    options = parser.parse_args()
+
+    results = run(options.sizes)
+    baseline = json.loads(BASELINE_PATH.read_text()) if BASELINE_PATH.exists() else {}
+    if options.update or not baseline:
+        baseline.update(results)
+        BASELINE_PATH.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+        print("Baseline written to {}".format(BASELINE_PATH))
+
+    failed = False
+    print(
+        "{:38} {:>10} {:>10} {:>10} {:>6} {:>6}".format(
+            "benchmark", "ms", "baseline", "peak KB", "loads", "saves"
+        )
+    )
+    for name, result in results.items():
+        expected = baseline.get(name, result)
+        flags = []
+        if (
+            result["ms"] > expected["ms"] * options.tolerance
+            and result["ms"] - expected["ms"] > options.min_delta
+        ):
+            flags.append("REGRESSION")
+        counters = COUNTERS[:2] if name.startswith(TIMED_RESULTS) else COUNTERS
+        flags.extend(
+            "{} {} != {}".format(counter, result[counter], expected[counter])
+            for counter in counters
+            if counter in expected and result[counter] != expected[counter]
+        )
+        failed = failed or bool(flags)
+        print(
+            "{name:38} {ms:10.2f} {expected:10.2f} {peak_kb:10.1f} {state_loads:6d} {state_saves:6d}{flag}".format(
+                name=name,
+                expected=expected["ms"],
+                flag="".join("  " + flag for flag in flags),
+                **result
+            )
+        )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+
+"""Shared fixtures for `tutorial_runner` tests."""
+
+import click
+import pytest
+
+from pathlib import Path
+
+SAMPLE_CONFIG = """\
+name = "Sample Tutorial"
+
+[[parts]]
+id = 1
+name = "Basics"
+dir = "part01"
+file = "hello.py"
+
+  [[parts.lessons]]
+  id = 1
+  name = "Say hello"
+  test = "test_01_hello.py"
+  solution = "hello_01.py"
+  objectives = "Print a greeting."
+
+  [[parts.lessons]]
+  id = 2
+  name = "Say goodbye"
+  test = "test_02_goodbye.py"
+  solution = "hello_02.py"
+
+[[parts]]
+id = 2
+name = "Options"
+dir = "part02"
+file = "options.py"
+
+  [[parts.lessons]]
+  id = 1
+  name = "Add an option"
+  test = "test_01_option.py"
+  solution = "options_01.py"
+
+  [[parts.lessons]]
+  id = 3
+  name = "Add a flag"
+"""
+
+
+@pytest.fixture
+def app_dir(tmp_path, monkeypatch):
+    """Point the app dir at a temporary directory."""
+    path = tmp_path / "app"
+    monkeypatch.setattr(click, "get_app_dir", lambda *args, **kwargs: str(path))
+    return path
+
+
+@pytest.fixture
+def tutorial_config(tmp_path, monkeypatch):
+    """Write a small two-part tutorial and chdir into it."""
+    tutorial_dir = tmp_path / "tutorial"
+    for part_dir in ("part01", "part02"):
+        (tutorial_dir / part_dir / "tests").mkdir(parents=True)
+        (tutorial_dir / part_dir / "solutions").mkdir()
+    config_path = tutorial_dir / "tutorial.toml"
+    config_path.write_text(SAMPLE_CONFIG)
+    monkeypatch.chdir(str(tutorial_dir))
+    return Path(str(config_path))
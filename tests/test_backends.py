@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for `tutorial_runner.backends`."""
+
+import multiprocessing
+import sqlite3
+
+from pathlib import Path
+
+from tutorial_runner.backends import SqliteBackend, TomlBackend
+from tutorial_runner.state import State
+
+
+def test_sqlite_backend_round_trip(app_dir, tutorial_config, monkeypatch):
+    monkeypatch.setenv("TUTORIAL_STATE_BACKEND", "sqlite")
+    State().initialize(str(tutorial_config))
+    state = State()
+    with state.session():
+        state.record_lesson_result(1, 1, "abc123", True)
+        assert state.complete_lesson(1, 1) == (1, 2)
+    state = State()
+    assert isinstance(state.backend, SqliteBackend)
+    assert state.get_lesson_result(1, 1)["digest"] == "abc123"
+    assert state.get_current_lesson()["name"] == "Say goodbye"
+    assert state.get_lesson_status(1, 1) == "complete"
+    assert state.get_lesson_status(1, 2) == "in-progress"
+    assert not Path(state.state_file_path).exists()
+
+
+def test_sqlite_backend_updates_single_rows(app_dir, tutorial_config, monkeypatch):
+    monkeypatch.setenv("TUTORIAL_STATE_BACKEND", "sqlite")
+    State().initialize(str(tutorial_config))
+    state = State()
+    state.set_lesson_status(2, 1, "complete")
+    db = sqlite3.connect(state.backend.path)
+    rows = db.execute("SELECT part, lesson, status FROM progress ORDER BY part, lesson").fetchall()
+    assert rows == [(1, 1, "in-progress"), (2, 1, "complete")]
+    assert db.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_sqlite_backend_migrates_toml_state(app_dir, tutorial_config, monkeypatch):
+    state = State()
+    state.initialize(str(tutorial_config))
+    state.complete_lesson(1, 1)
+    monkeypatch.setenv("TUTORIAL_STATE_BACKEND", "sqlite")
+    state = State()
+    assert state.get_lesson_status(1, 1) == "complete"
+    assert state.get_current_lesson_id() == 2
+    assert not Path(state.state_file_path).exists()
+    assert Path(state.state_file_path + ".migrated").exists()
+
+
+def _hammer_progress(state_path, part_id, rounds):
+    state = State(backend=TomlBackend(state_path))
+    for lesson_id in range(1, rounds + 1):
+        state.set_lesson_status(part_id, lesson_id, "complete")
+
+
+def _hammer_reads(state_path, rounds, errors):
+    backend = TomlBackend(state_path)
+    for _ in range(rounds):
+        try:
+            backend.read()
+        except Exception as e:
+            errors.put(repr(e))
+
+
+def test_toml_backend_survives_parallel_writers(app_dir, tutorial_config):
+    state = State()
+    state.initialize(str(tutorial_config))
+    context = multiprocessing.get_context("fork")
+    errors = context.Queue()
+    processes = [
+        context.Process(target=_hammer_progress, args=(state.state_file_path, part_id, 25))
+        for part_id in range(10, 16)
+    ]
+    processes += [
+        context.Process(target=_hammer_reads, args=(state.state_file_path, 100, errors))
+        for _ in range(2)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    assert all(process.exitcode == 0 for process in processes)
+    assert errors.empty()
+    progress = State().load()["progress"]
+    for part_id in range(10, 16):
+        for lesson_id in range(1, 26):
+            assert progress["{}.{}".format(part_id, lesson_id)] == "complete"
+    assert progress["1.1"] == "in-progress"
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for `tutorial_runner.classroom`."""
+
+from click.testing import CliRunner
+
+from tutorial_runner import cli
+from tutorial_runner.classroom import Classroom
+from tutorial_runner.state import State
+
+
+def test_classroom_aggregates_progress_across_learners(app_dir, tutorial_config, tmp_path, monkeypatch):
+    store = tmp_path / "classroom" / "classroom.db"
+    monkeypatch.setenv("TUTORIAL_CLASSROOM", str(store))
+    for learner, completed in (("ada", 0), ("bob", 1), ("cy", 1), ("dee", 2)):
+        monkeypatch.setenv("TUTORIAL_LEARNER", learner)
+        state = State()
+        state.initialize(str(tutorial_config))
+        part_id, lesson_id = 1, 1
+        for _ in range(completed):
+            part_id, lesson_id = state.complete_lesson(part_id, lesson_id)
+
+    monkeypatch.setenv("TUTORIAL_LEARNER", "bob")
+    assert State().get_current_lesson()["name"] == "Say goodbye"
+    assert (tmp_path / "classroom" / "courses").is_dir()
+    assert not (app_dir / "tutorial-state.toml").exists()
+
+    room = Classroom(str(store))
+    assert room.lesson_summary() == [(1, 1, 1, 3), (1, 2, 2, 1), (2, 1, 1, 0)]
+    assert room.lesson_summary(part_id=1, lesson_id=2) == [(1, 2, 2, 1)]
+    assert room.learners_on(1, 2) == ["bob", "cy"]
+
+    result = CliRunner().invoke(
+        cli.tutorial,
+        ["classroom", "progress", "-p", "1", "--learners", "--config", str(tutorial_config)],
+    )
+    assert result.exit_code == 0, result.output
+    assert "Say goodbye" in result.output
+    assert "bob, cy" in result.output
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the `tutorial` command line interface."""
+
+import json
+
+import pytest
+
+from click.testing import CliRunner
+
+from tutorial_runner import cli
+from tutorial_runner.state import State
+
+
+@pytest.fixture
+def runner(app_dir, tutorial_config):
+    runner = CliRunner()
+    result = runner.invoke(cli.tutorial, ["init", "-r"])
+    assert result.exit_code == 0, result.output
+    return runner
+
+
+@pytest.fixture
+def lesson_runs(monkeypatch):
+    """Replace the pytest run with a stub that passes and records its calls."""
+    runs = []
+    monkeypatch.setattr(cli, "run_lesson", lambda test_file, limits=None, selection=None, cache=None: runs.append(test_file) or (True, None))
+    return runs
+
+
+def test_check_reuses_result_until_files_change(runner, tutorial_config, lesson_runs):
+    working_file = tutorial_config.parent / "part01" / "hello.py"
+    working_file.write_text("print('hello')\n")
+    runner.invoke(cli.tutorial, ["lesson", "-p", "1", "-l", "1"])
+    assert runner.invoke(cli.tutorial, ["check"]).exit_code == 0
+    runner.invoke(cli.tutorial, ["lesson", "-p", "1", "-l", "1"])
+    result = runner.invoke(cli.tutorial, ["check"])
+    assert result.exit_code == 0
+    assert "Nothing changed" in result.output
+    assert len(lesson_runs) == 1
+
+    runner.invoke(cli.tutorial, ["lesson", "-p", "1", "-l", "1"])
+    assert runner.invoke(cli.tutorial, ["check", "--force"]).exit_code == 0
+    working_file.write_text("print('hello, world')\n")
+    runner.invoke(cli.tutorial, ["lesson", "-p", "1", "-l", "1"])
+    assert runner.invoke(cli.tutorial, ["check"]).exit_code == 0
+    assert len(lesson_runs) == 3
+
+    status = runner.invoke(cli.tutorial, ["status"])
+    assert "complete (passing since " in status.output
+
+
+def test_profile_flag_logs_phase_timings(runner, app_dir):
+    result = runner.invoke(cli.tutorial, ["--profile", "status"])
+    assert result.exit_code == 0, result.output
+    with open(str(app_dir / "profile.jsonl")) as log:
+        record = json.loads(log.readlines()[-1])
+    assert record["command"] == "status"
+    assert record["phases"]["state.load"]["count"] == 1
+    assert "render" in record["phases"]
+    assert record["counters"]["state.bytes_read"] > 0
+
+
+def test_status_filters_and_formats(runner):
+    State().complete_lesson(1, 1)
+    runner.invoke(cli.tutorial, ["lesson", "-p", "1", "-l", "2"])
+
+    result = runner.invoke(cli.tutorial, ["status", "--format", "json", "--incomplete"])
+    assert result.exit_code == 0, result.output
+    rows = json.loads(result.output)
+    assert [(row["part"], row["lesson"]) for row in rows] == [(1, 2), (2, 1), (2, 3)]
+    assert rows[0]["status"] == "in-progress"
+
+    result = runner.invoke(cli.tutorial, ["status", "--format", "tsv", "-p", "2", "--limit", "1"])
+    assert result.output.splitlines() == [
+        "part\tlesson\tstatus\tpassing_since\tduration\tflaky\tname",
+        "2\t1\tincomplete\t\t\tFalse\tAdd an option",
+    ]
+
+    result = runner.invoke(cli.tutorial, ["status", "--format", "json", "-p", "9"])
+    assert json.loads(result.output) == []
+
+
+def test_lesson_cards_are_rendered_at_init(runner, app_dir, tutorial_config):
+    card_files = list((app_dir / "courses" / "cards").glob("*/*.json"))
+    assert sorted(path.name for path in card_files) == ["1.json", "2.json"]
+
+    result = runner.invoke(cli.tutorial, ["lesson", "-p", "2"])
+    assert result.output.splitlines()[:4] == [
+        "Currently working on Part 02, Lesson 01 - Add an option",
+        "",
+        "Working file: part02/options.py",
+        "   Test file: part02/tests/test_01_option.py",
+    ]
+
+
+def test_lesson_card_follows_edited_config_before_sync(runner, app_dir, tutorial_config):
+    assert "Say hello" in runner.invoke(cli.tutorial, ["lesson"]).output
+    tutorial_config.write_text(
+        tutorial_config.read_text().replace('name = "Say hello"', 'name = "Say hi"')
+    )
+    result = runner.invoke(cli.tutorial, ["lesson"])
+    assert result.output.splitlines()[0] == "Currently working on Part 01, Lesson 01 - Say hi"
+
+
+def test_peek_streams_solution_in_chunks(runner, tutorial_config, monkeypatch):
+    solution = "\n".join("line {}".format(number) for number in range(5000)) + "\n"
+    (tutorial_config.parent / "part01" / "solutions" / "hello_01.py").write_text(solution)
+    reads = []
+    original = cli.iter_file
+    monkeypatch.setattr(
+        cli, "iter_file", lambda path: (reads.append(chunk) or chunk for chunk in original(path, 1024))
+    )
+    result = runner.invoke(cli.tutorial, ["peek", "--no-pager", "--no-color"])
+    assert result.exit_code == 0, result.output
+    assert solution in result.output
+    assert len(reads) > 1 and max(len(chunk) for chunk in reads) <= 1024
+
+
+def test_cached_failure_shows_messages_until_conftest_changes(runner, tutorial_config, monkeypatch):
+    summary = {
+        "passed": 0,
+        "failed": 1,
+        "duration": 0.1,
+        "slowest": [],
+        "failures": [{"name": "test_01_hello.py::test_hello", "message": "assert 'bye' == 'hello'"}],
+    }
+    runs = []
+    monkeypatch.setattr(
+        cli, "run_lesson", lambda test_file, *args: runs.append(test_file) or (False, summary)
+    )
+    assert runner.invoke(cli.tutorial, ["check"]).exit_code == 1
+    result = runner.invoke(cli.tutorial, ["check"])
+    assert result.exit_code == 1
+    assert "Nothing changed" in result.output
+    assert "assert 'bye' == 'hello'" in result.output
+    assert len(runs) == 1
+
+    (tutorial_config.parent / "part01" / "tests" / "conftest.py").write_text("import pytest\n")
+    assert runner.invoke(cli.tutorial, ["check"]).exit_code == 1
+    assert len(runs) == 2
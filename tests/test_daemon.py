@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for `tutorial_runner.daemon`."""
+
+import multiprocessing
+import os
+import time
+
+import pytest
+
+from tutorial_runner import daemon
+
+
+@pytest.fixture
+def check_server(tmp_path):
+    path = str(tmp_path / "checkd.sock")
+    process = multiprocessing.get_context("fork").Process(target=daemon.serve, args=(path,))
+    process.start()
+    deadline = time.time() + 30
+    while not os.path.exists(path):
+        assert time.time() < deadline, "check server did not start"
+        time.sleep(0.05)
+    yield path
+    process.terminate()
+    process.join()
+
+
+def test_check_server_runs_fresh_code_each_time(check_server, tmp_path):
+    (tmp_path / "lesson.py").write_text("ANSWER = 41\n")
+    (tmp_path / "test_lesson.py").write_text(
+        "from lesson import ANSWER\n\ndef test_answer():\n    assert ANSWER == 42\n"
+    )
+    args = ["-q", "-p", "no:cacheprovider", "test_lesson.py"]
+    assert daemon.run_remote(check_server, args, cwd=str(tmp_path)).exit_code == 1
+    (tmp_path / "lesson.py").write_text("ANSWER = 42  # fixed\n")
+    run = daemon.run_remote(check_server, args, cwd=str(tmp_path))
+    assert run.exit_code == 0
+    assert run.duration > 0
+    assert run.report["tests"][0]["outcome"] == "passed"
+
+
+def test_check_server_stops_tests_after_timeout(check_server, tmp_path):
+    (tmp_path / "test_forever.py").write_text("def test_forever():\n    while True:\n        pass\n")
+    args = ["-q", "-p", "no:cacheprovider", "test_forever.py"]
+    started = time.perf_counter()
+    run = daemon.run_remote(check_server, args, cwd=str(tmp_path), limits={"timeout": 1})
+    assert time.perf_counter() - started < 20
+    assert run.timed_out
+    assert run.exit_code == 1
+
+
+def test_run_remote_without_server_raises(tmp_path):
+    with pytest.raises(OSError):
+        daemon.run_remote(str(tmp_path / "missing.sock"), ["-q"])
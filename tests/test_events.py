@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for `tutorial_runner.events`."""
+
+import json
+import socket
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+from click.testing import CliRunner
+
+from tutorial_runner import cli
+from tutorial_runner.events import EVENTS, Emitter, HttpSink, UnixSocketSink, sink_from_url
+
+
+class Collector:
+    """A stand-in analytics collector receiving JSON lines on a Unix socket."""
+
+    def __init__(self, path):
+        self.path = path
+        self.events = []
+        self.batches = 0
+        self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._server.bind(path)
+        self._server.listen(8)
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    def _serve(self):
+        while True:
+            try:
+                connection, _ = self._server.accept()
+            except OSError:
+                return
+            data = b""
+            with connection:
+                for chunk in iter(lambda: connection.recv(65536), b""):
+                    data += chunk
+            self.batches += 1
+            self.events.extend(json.loads(line) for line in data.decode("utf-8").splitlines())
+
+    def close(self):
+        self._server.close()
+
+
+@pytest.fixture
+def collector(tmp_path):
+    collector = Collector(str(tmp_path / "collector.sock"))
+    yield collector
+    collector.close()
+
+
+def test_events_are_batched_to_the_collector(collector):
+    emitter = Emitter(batch_size=10, flush_interval=5)
+    emitter.start(UnixSocketSink(collector.path), context={"learner": "ada"})
+    for lesson in range(25):
+        emitter.emit("lesson_started", part=1, lesson=lesson)
+    emitter.close()
+    deadline = time.monotonic() + 5
+    while len(collector.events) < 25 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert [event["lesson"] for event in collector.events] == list(range(25))
+    assert collector.events[0]["learner"] == "ada"
+    assert collector.batches == 3
+
+
+def test_slow_sink_does_not_block_and_drops_overflow():
+    release = threading.Event()
+
+    class StuckSink:
+        def write(self, batch):
+            release.wait()
+
+    emitter = Emitter(max_queue=5, batch_size=1, flush_interval=0)
+    emitter.start(StuckSink())
+    started = time.perf_counter()
+    for lesson in range(20):
+        emitter.emit("check_failed", lesson=lesson)
+    assert time.perf_counter() - started < 0.5
+    assert emitter.dropped >= 14
+    release.set()
+    emitter.close()
+
+
+def test_http_sink_posts_json_batches():
+    received = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            received.append(json.loads(self.rfile.read(int(self.headers["Content-Length"]))))
+            self.send_response(204)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.handle_request, daemon=True)
+    thread.start()
+    sink = sink_from_url("http://127.0.0.1:{}/events".format(server.server_port))
+    assert isinstance(sink, HttpSink)
+    sink.write([{"event": "lesson_completed"}])
+    thread.join(5)
+    server.server_close()
+    assert received == [[{"event": "lesson_completed"}]]
+
+
+def test_cli_writes_progress_events_to_jsonl(app_dir, tutorial_config, tmp_path):
+    events_path = tmp_path / "events.jsonl"
+    runner = CliRunner(env={"TUTORIAL_EVENTS": str(events_path)})
+    assert runner.invoke(cli.tutorial, ["init", "-r"]).exit_code == 0
+    assert runner.invoke(cli.tutorial, ["lesson", "-p", "2"]).exit_code == 0
+    assert runner.invoke(cli.tutorial, ["lesson", "-p", "2"]).exit_code == 0
+    assert not EVENTS.enabled
+    events = [json.loads(line) for line in events_path.read_text().splitlines()]
+    assert [(event["event"], event["command"]) for event in events] == [
+        ("lesson_started", "lesson")
+    ]
+    assert (events[0]["part"], events[0]["lesson"]) == (2, 1)
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for `tutorial_runner.prewarm`."""
+
+import sys
+import time
+
+from click.testing import CliRunner
+
+from tutorial_runner import cli, prewarm
+from tutorial_runner.runner import CollectionCache, lesson_args, lesson_selection
+from tutorial_runner.state import State
+
+
+def test_prewarm_compiles_files_and_caches_collection(app_dir, tutorial_config, tmp_path, monkeypatch):
+    monkeypatch.setattr(sys, "dont_write_bytecode", False)
+    part01 = tutorial_config.parent / "part01"
+    (part01 / "hello.py").write_text("GREETING = 'hello'\n")
+    (part01 / "tests" / "test_02_goodbye.py").write_text(
+        "def test_goodbye():\n    pass\n\ndef test_other():\n    pass\n"
+    )
+    State().initialize(str(tutorial_config))
+    state = State()
+    state.set_current_lesson(1, 2)
+    lesson = dict(state.get_current_lesson(), keyword="not other")
+    assert prewarm.missing_files(lesson) == [part01 / "solutions" / "hello_02.py"]
+
+    cache = CollectionCache(tmp_path / "collection")
+    assert prewarm.prewarm(lesson, cache) == 0
+    assert list((part01 / "__pycache__").glob("hello.*.pyc"))
+    assert list((part01 / "tests" / "__pycache__").glob("test_02_goodbye.*pytest*.pyc"))
+    args, key = lesson_args(
+        str(part01 / "tests" / "test_02_goodbye.py"), lesson_selection(lesson), cache
+    )
+    assert key is None
+    assert args[-1].endswith("test_02_goodbye.py::test_goodbye")
+
+
+def test_prewarm_gives_up_on_slow_collection(app_dir, tutorial_config, monkeypatch):
+    part01 = tutorial_config.parent / "part01"
+    (part01 / "tests" / "test_01_hello.py").write_text("while True:\n    pass\n")
+    State().initialize(str(tutorial_config))
+    monkeypatch.setattr(prewarm, "PREWARM_TIMEOUT", 1.0)
+    started = time.perf_counter()
+    assert prewarm.prewarm(State().get_current_lesson()) == 1
+    assert time.perf_counter() - started < 20
+
+
+def test_check_prewarms_the_next_lesson(app_dir, tutorial_config, monkeypatch):
+    monkeypatch.setattr(cli, "run_lesson", lambda *args, **kwargs: (True, None))
+    warmed = []
+    monkeypatch.setattr(prewarm, "in_background", lambda lesson, cache: warmed.append(lesson))
+    runner = CliRunner()
+    runner.invoke(cli.tutorial, ["init", "-r"])
+    assert runner.invoke(cli.tutorial, ["check"]).exit_code == 0
+    assert warmed == []
+    result = runner.invoke(cli.tutorial, ["check", "--prewarm"])
+    assert result.exit_code == 0, result.output
+    assert [(lesson["part"]["id"], lesson["id"]) for lesson in warmed] == [(2, 1)]
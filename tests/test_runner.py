@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for `tutorial_runner.runner`."""
+
+import time
+
+from tutorial_runner import jsonfile
+from tutorial_runner.runner import (
+    CollectionCache,
+    lesson_args,
+    lesson_limits,
+    lesson_selection,
+    run_isolated,
+    summarize_tests,
+)
+
+PYTEST_ARGS = ["-q", "-p", "no:cacheprovider", "test_lesson.py"]
+
+
+def test_lesson_limits_override_part_limits():
+    lesson = {"timeout": 5, "part": {"timeout": 30, "memory": 256}}
+    assert lesson_limits(lesson) == {"timeout": 5, "memory": 256}
+
+
+def test_run_isolated_reports_duration_and_memory(tmp_path):
+    (tmp_path / "test_lesson.py").write_text("def test_ok():\n    assert True\n")
+    with open(str(tmp_path / "out.log"), "w") as log:
+        run = run_isolated(PYTEST_ARGS, cwd=str(tmp_path), output=log)
+    assert run.exit_code == 0
+    assert not run.timed_out
+    assert run.duration > 0
+    assert run.peak_memory > 0
+
+
+def test_run_isolated_kills_runaway_tests(tmp_path):
+    (tmp_path / "test_lesson.py").write_text(
+        "def test_forever():\n    while True:\n        pass\n"
+    )
+    started = time.time()
+    with open(str(tmp_path / "out.log"), "w") as log:
+        run = run_isolated(PYTEST_ARGS, cwd=str(tmp_path), output=log, limits={"timeout": 1})
+    assert run.timed_out
+    assert run.exit_code != 0
+    assert time.time() - started < 10
+
+
+def test_run_isolated_applies_cpu_limit(tmp_path):
+    (tmp_path / "test_lesson.py").write_text(
+        "def test_forever():\n    while True:\n        pass\n"
+    )
+    started = time.time()
+    with open(str(tmp_path / "out.log"), "w") as log:
+        run = run_isolated(PYTEST_ARGS, cwd=str(tmp_path), output=log, limits={"cpu-time": 1})
+    assert run.exit_code != 0
+    assert not run.timed_out
+    assert time.time() - started < 10
+
+
+def test_lesson_selection_is_resolved_once_and_cached(tmp_path):
+    (tmp_path / "test_part.py").write_text(
+        "import pytest\n\n"
+        "def test_hello():\n    pass\n\n"
+        "@pytest.mark.goodbye\ndef test_goodbye():\n    pass\n\n"
+        "def test_later():\n    assert False\n"
+    )
+    (tmp_path / "pytest.ini").write_text("[pytest]\nmarkers = goodbye\n")
+    test_file = str(tmp_path / "test_part.py")
+    cache = CollectionCache(tmp_path / "cache")
+    selection = lesson_selection({"tests": ["test_hello", "test_goodbye"], "marker": "goodbye"})
+
+    args, key = lesson_args(test_file, selection, cache)
+    assert args[-3:] == ["goodbye", test_file + "::test_hello", test_file + "::test_goodbye"]
+    with open(str(tmp_path / "out.log"), "w") as log:
+        run = run_isolated(args + ["-p", "no:cacheprovider"], cwd=str(tmp_path), output=log)
+    assert run.exit_code == 0
+    assert run.report["nodes"] == [test_file + "::test_goodbye"]
+    cache.put(key, run.report["nodes"])
+
+    args, key = lesson_args(test_file, selection, cache)
+    assert key is None
+    assert args[-1] == test_file + "::test_goodbye"
+    assert "-m" not in args
+
+    (tmp_path / "test_part.py").write_text("def test_goodbye():\n    pass\n")
+    assert lesson_args(test_file, selection, cache)[1] is not None
+
+
+def test_cached_selection_runs_the_lessons_own_module(tmp_path):
+    source = "def test_where():\n    pass\n\ndef test_other():\n    pass\n"
+    test_files = []
+    for name in ("a", "b"):
+        (tmp_path / name / "tests").mkdir(parents=True)
+        (tmp_path / name / "tests" / "test_part.py").write_text(source)
+        test_files.append(str(tmp_path / name / "tests" / "test_part.py"))
+    cache = CollectionCache(tmp_path / "cache")
+    selection = lesson_selection({"keyword": "where"})
+
+    args, key = lesson_args(test_files[0], selection, cache)
+    with open(str(tmp_path / "out.log"), "w") as log:
+        run = run_isolated(args + ["-p", "no:cacheprovider"], cwd=str(tmp_path), output=log)
+    cache.put(key, run.report["nodes"])
+
+    args, key = lesson_args(test_files[1], selection, cache)
+    assert key is None
+    assert args[-1] == test_files[1] + "::test_where"
+
+
+def test_run_isolated_reports_each_test(tmp_path):
+    (tmp_path / "test_lesson.py").write_text(
+        "import time\n\n"
+        "def test_slow():\n    time.sleep(0.2)\n\n"
+        "def test_broken():\n    assert 1 == 2, 'numbers differ'\n"
+    )
+    with open(str(tmp_path / "out.log"), "w") as log:
+        run = run_isolated(PYTEST_ARGS, cwd=str(tmp_path), output=log)
+    outcomes = {test["name"]: test["outcome"] for test in run.report["tests"]}
+    assert outcomes == {"test_lesson.py::test_slow": "passed", "test_lesson.py::test_broken": "failed"}
+
+    summary = summarize_tests(run.report["tests"], slowest=1)
+    assert (summary["passed"], summary["failed"]) == (1, 1)
+    assert summary["duration"] >= 0.2
+    assert [test["name"] for test in summary["slowest"]] == ["test_lesson.py::test_slow"]
+    assert summary["failures"][0]["name"] == "test_lesson.py::test_broken"
+    assert "numbers differ" in summary["failures"][0]["message"]
+
+
+def test_failed_cache_write_leaves_no_temp_file(tmp_path, monkeypatch):
+    cache = CollectionCache(tmp_path / "cache")
+    cache.put("key", ["test_a.py::test_one"])
+
+    def fail(*args):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(jsonfile.os, "replace", fail)
+    cache.put("key", ["test_a.py::test_two"])
+    assert cache.get("key") == ["test_one"]
+    assert [path.name for path in (tmp_path / "cache").iterdir()] == ["key.json"]
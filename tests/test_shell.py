@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for `tutorial shell` and `tutorial batch`."""
+
+import json
+
+from click.testing import CliRunner
+
+from tutorial_runner import cli, daemon
+from tutorial_runner.state import State
+
+
+def test_batch_runs_commands_on_one_loaded_state(app_dir, tutorial_config, monkeypatch):
+    runner = CliRunner()
+    runner.invoke(cli.tutorial, ["init", "-r"])
+    reads = []
+    original_read = State.read
+    monkeypatch.setattr(State, "read", lambda self: reads.append(1) or original_read(self))
+    preloads = []
+    monkeypatch.setattr(daemon, "preload", lambda: preloads.append(1))
+
+    commands = "\n".join(
+        [
+            "lesson -p 2",
+            json.dumps({"jsonrpc": "2.0", "id": 1, "method": "status", "params": ["--format", "json"]}),
+            json.dumps({"jsonrpc": "2.0", "id": 2, "method": "lesson", "params": {"args": ["-p", "7"]}}),
+            json.dumps({"jsonrpc": "2.0", "id": 3, "method": "batch"}),
+            "not json {",
+        ]
+    )
+    result = runner.invoke(cli.tutorial, ["batch"], input=commands + "\n")
+    assert result.exit_code == 1
+    lines = result.output.splitlines()
+    assert lines[0] == "Currently working on Part 02, Lesson 01 - Add an option"
+    responses = [json.loads(line) for line in lines if line.startswith('{"jsonrpc"')]
+
+    assert responses[0]["result"]["exit_code"] == 0
+    rows = json.loads(responses[0]["result"]["output"])
+    assert [row["status"] for row in rows if row["part"] == 2] == ["in-progress", "incomplete"]
+    assert responses[1]["result"]["exit_code"] == 1
+    assert "7 is not a valid part ID" in responses[1]["result"]["output"]
+    assert responses[2]["error"]["code"] == -32601
+    assert len(reads) == 1
+    assert len(preloads) == 1
+
+
+def test_shell_keeps_going_after_errors(app_dir, tutorial_config):
+    runner = CliRunner()
+    runner.invoke(cli.tutorial, ["init", "-r"])
+    result = runner.invoke(cli.tutorial, ["shell"], input="lesson -p 9\nlesson -p 2\nexit\nversion\n")
+    assert result.exit_code == 0
+    assert "9 is not a valid part ID" in result.output
+    assert "Part 02, Lesson 01" in result.output
+    assert "Tutorial-Runner" not in result.output
+
+
+def test_batch_check_failure_output_goes_to_stderr(app_dir, tutorial_config, capfd):
+    (tutorial_config.parent / "part01" / "tests" / "test_01_hello.py").write_text(
+        "def test_greeting():\n    assert 'greeting-was-never-printed' == ''\n"
+    )
+    runner = CliRunner()
+    runner.invoke(cli.tutorial, ["init", "-r"])
+    capfd.readouterr()
+    request = {"jsonrpc": "2.0", "id": 1, "method": "check", "params": ["--force"]}
+    result = runner.invoke(cli.tutorial, ["batch"], input=json.dumps(request) + "\n")
+    assert result.exit_code == 1
+    response = json.loads(result.output.splitlines()[-1])
+    assert response["result"]["exit_code"] == 1
+    captured = capfd.readouterr()
+    assert "greeting-was-never-printed" in captured.err
+    assert "greeting-was-never-printed" not in captured.out
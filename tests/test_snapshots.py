@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for `tutorial_runner.snapshots` and the commands using it."""
+
+import pytest
+
+from click.testing import CliRunner
+
+from tutorial_runner import cli
+from tutorial_runner.snapshots import SnapshotStore
+
+
+def test_store_keeps_each_version_once(tmp_path):
+    store = SnapshotStore(tmp_path / "snapshots")
+    working = tmp_path / "hello.py"
+    working.write_text("print('one')\n")
+    first = store.save(working, "solve")
+    assert store.save(working, "solve") == first
+    working.write_text("print('two')\n")
+    store.save(working, "solve")
+    working.write_text("print('one')\n")
+    store.save(working, "solve")
+
+    assert [entry["digest"] for entry in store.history(working)] == [
+        first["digest"],
+        store.history(working)[1]["digest"],
+        first["digest"],
+    ]
+    assert len(list((tmp_path / "snapshots" / "objects").glob("*/*"))) == 2
+    assert store.read(first["digest"]) == b"print('one')\n"
+    assert store.find(working, first["digest"][:8])["digest"] == first["digest"]
+    with pytest.raises(LookupError):
+        store.find(working, "4")
+
+
+def test_solve_snapshots_work_and_restore_brings_it_back(app_dir, tutorial_config):
+    part_dir = tutorial_config.parent / "part01"
+    (part_dir / "hello.py").write_text("print('my work')\n")
+    (part_dir / "solutions" / "hello_01.py").write_text("print('hello')\n")
+    runner = CliRunner()
+    runner.invoke(cli.tutorial, ["init", "-r"])
+
+    result = runner.invoke(cli.tutorial, ["solve", "-y"])
+    assert result.exit_code == 0, result.output
+    assert (part_dir / "hello.py").read_text() == "print('hello')\n"
+    assert sorted(path.name for path in part_dir.iterdir()) == ["hello.py", "solutions", "tests"]
+
+    result = runner.invoke(cli.tutorial, ["history"])
+    assert "  1  " in result.output and "solve" in result.output
+
+    result = runner.invoke(cli.tutorial, ["restore", "1", "-y"])
+    assert result.exit_code == 0, result.output
+    assert (part_dir / "hello.py").read_text() == "print('my work')\n"
+    result = runner.invoke(cli.tutorial, ["history"])
+    assert "  2  " in result.output and "restore" in result.output
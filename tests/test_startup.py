@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+
+"""Guard the `tutorial` start-up path against heavy imports."""
+
+import subprocess
+import sys
+
+import pytest
+
+HEAVY_MODULES = ("pytest", "_pytest", "pkg_resources", "sqlite3", "concurrent.futures")
+
+
+def imported_modules(args, cwd, env):
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "tutorial_runner"] + args,
+        cwd=cwd,
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+    )
+    assert completed.returncode == 0, completed.stdout + completed.stderr
+    return {
+        line.rsplit("|", 1)[1].strip()
+        for line in completed.stderr.splitlines()
+        if line.startswith("import time:")
+    }
+
+
+@pytest.mark.parametrize("args", [["--help"], ["version"], ["status"], ["lesson"]])
+def test_light_commands_do_not_import_pytest(args, tmp_path, tutorial_config):
+    env = {
+        "PATH": "",
+        "PYTHONPATH": ":".join(sys.path),
+        "XDG_CONFIG_HOME": str(tmp_path / "config"),
+    }
+    cwd = str(tutorial_config.parent)
+    subprocess.run(
+        [sys.executable, "-m", "tutorial_runner", "init", "-r"], cwd=cwd, env=env, check=True
+    )
+    modules = imported_modules(args, cwd, env)
+    assert "tutorial_runner.cli" in modules
+    assert not [name for name in modules if name.split(".")[0] in HEAVY_MODULES or name in HEAVY_MODULES]
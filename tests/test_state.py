@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for `tutorial_runner.state`."""
+
+import os
+import types
+
+import click
+import pytest
+import pytoml
+
+from tutorial_runner import course
+from tutorial_runner import state as state_module
+from tutorial_runner.state import State
+
+
+def test_initialize_sets_first_lesson(app_dir, tutorial_config):
+    state = State()
+    state.initialize(str(tutorial_config))
+    assert state.is_initialized()
+    assert state.get_current_part_id() == 1
+    assert state.get_current_lesson_id() == 1
+    assert state.get_lesson_status(1, 1) == "in-progress"
+
+
+def test_session_defers_writes_until_exit(app_dir, tutorial_config):
+    State().initialize(str(tutorial_config))
+    state = State()
+    with state.session():
+        state.complete_lesson(1, 1)
+        with open(state.state_file_path) as statefile:
+            on_disk = pytoml.load(statefile)
+        assert on_disk["progress"].get("1.1") == "in-progress"
+    with open(state.state_file_path) as statefile:
+        on_disk = pytoml.load(statefile)
+    assert on_disk["progress"]["1.1"] == "complete"
+    assert on_disk["current"] == {"part": 1, "lesson": 2}
+
+
+def test_session_reads_state_file_once(app_dir, tutorial_config, monkeypatch):
+    State().initialize(str(tutorial_config))
+    state = State()
+    reads = []
+    original_read = state.read
+    monkeypatch.setattr(state, "read", lambda: reads.append(1) or original_read())
+    with state.session():
+        for part in state.list_parts():
+            for lesson in part["lessons"]:
+                state.get_lesson_status(part["id"], lesson["id"])
+        state.set_current_lesson(2, 1)
+        state.get_current_lesson()
+    assert len(reads) == 1
+
+
+def test_next_lesson_follows_configuration_order(app_dir, tutorial_config):
+    state = State()
+    state.initialize(str(tutorial_config))
+    assert state.get_next_lesson_id(1, 1) == (1, 2)
+    assert state.get_next_lesson_id(1, 2) == (2, 1)
+    assert state.get_next_lesson_id(2, 1) == (2, 3)
+    assert state.get_next_lesson_id(2, 3) == (None, None)
+
+
+def test_set_current_lesson_rejects_unknown_lesson(app_dir, tutorial_config):
+    state = State()
+    state.initialize(str(tutorial_config))
+    with pytest.raises(click.ClickException):
+        state.set_current_lesson(2, 2)
+    with pytest.raises(click.ClickException):
+        state.set_current_lesson(9, 1)
+
+
+def test_state_file_does_not_copy_parts(app_dir, tutorial_config):
+    state = State()
+    state.initialize(str(tutorial_config))
+    with open(state.state_file_path) as statefile:
+        on_disk = pytoml.load(statefile)
+    assert "parts" not in on_disk
+    assert on_disk["config"] == str(tutorial_config)
+    assert [part["id"] for part in state.list_parts()] == [1, 2]
+
+
+def test_course_cache_skips_parse_until_config_changes(app_dir, tutorial_config, monkeypatch):
+    State().initialize(str(tutorial_config))
+    parses = []
+    original_loads = pytoml.loads
+    monkeypatch.setattr(
+        course,
+        "pytoml",
+        types.SimpleNamespace(loads=lambda text: parses.append(1) or original_loads(text)),
+    )
+    assert State().course.get_lesson(2, 3) is not None
+    assert parses == []
+
+    tutorial_config.write_text(tutorial_config.read_text().replace('"Add a flag"', '"Add a switch"'))
+    os.utime(str(tutorial_config), ns=(0, 0))
+    assert State().course.get_lesson(2, 3).data["name"] == "Add a switch"
+    assert parses == [1]
+
+
+def test_legacy_state_with_parts_still_loads(app_dir, tutorial_config):
+    app_dir.mkdir()
+    legacy = pytoml.loads(tutorial_config.read_text())
+    legacy.update(
+        tutorial_dir=str(tutorial_config.parent),
+        current={"part": 1, "lesson": 2},
+        progress={"1.1": "complete"},
+    )
+    state = State()
+    state.save(legacy)
+    assert State().get_current_lesson()["name"] == "Say goodbye"
+
+
+def test_sync_keeps_progress_for_remaining_lessons(app_dir, tutorial_config):
+    State().initialize(str(tutorial_config))
+    state = State()
+    state.complete_lesson(1, 1)
+    state.complete_lesson(1, 2)
+    state.record_lesson_result(1, 1, "digest-1.1", True)
+    state.record_lesson_result(2, 3, "digest-2.3", False)
+    assert state.get_current_lesson_id() == 1
+
+    config = tutorial_config.read_text()
+    start = config.index("  [[parts.lessons]]\n  id = 1\n  name = \"Add an option\"")
+    end = config.index("  [[parts.lessons]]\n  id = 3")
+    tutorial_config.write_text(config[:start] + config[end:] + "\n  [[parts.lessons]]\n  id = 4\n  name = \"Add a command\"\n")
+
+    diff = State().sync()
+    assert diff.added == {(2, 4)}
+    assert diff.removed == {(2, 1)}
+    assert diff.changed_parts == {2}
+
+    state = State()
+    assert state.get_lesson_status(1, 1) == "complete"
+    assert state.get_lesson_status(1, 2) == "complete"
+    assert (state.get_current_part_id(), state.get_current_lesson_id()) == (2, 3)
+    assert state.get_lesson_result(1, 1)["digest"] == "digest-1.1"
+    assert state.get_lesson_result(2, 3) is None
+    assert "2.1" not in state.load()["progress"]
+    assert state.get_next_lesson_id(2, 3) == (2, 4)
+    assert not State().sync()
+
+
+def test_sync_moves_past_a_removed_last_lesson(app_dir, tutorial_config):
+    State().initialize(str(tutorial_config))
+    state = State()
+    state.complete_lesson(1, 1)
+    assert state.get_current_lesson_id() == 2
+    config = tutorial_config.read_text()
+    tutorial_config.write_text(
+        config.replace('id = 2\n  name = "Say goodbye"', 'id = 5\n  name = "Say goodbye"')
+    )
+    with pytest.raises(click.ClickException, match="tutorial sync"):
+        State().get_current_lesson()
+
+    diff = State().sync()
+    assert diff.removed == {(1, 2)}
+    state = State()
+    assert (state.get_current_part_id(), state.get_current_lesson_id()) == (1, 5)
+    assert state.get_lesson_status(1, 1) == "complete"
+
+
+def test_sync_renders_cards_only_for_changed_parts(app_dir, tutorial_config, monkeypatch):
+    State().initialize(str(tutorial_config))
+    rendered = []
+    part_cards = state_module.part_cards
+    monkeypatch.setattr(
+        state_module, "part_cards", lambda part: rendered.append(part.id) or part_cards(part)
+    )
+    tutorial_config.write_text(
+        tutorial_config.read_text().replace('name = "Add a flag"', 'name = "Add a switch"')
+    )
+    assert State().sync().changed_parts == {2}
+    assert rendered == [2]
+    state = State()
+    base_dir = state.load()["tutorial_dir"]
+    assert "Add a switch" in state.get_lesson_card(2, 3, base_dir)
+    assert "Say hello" in state.get_lesson_card(1, 1, base_dir)
+    assert rendered == [2]
+
+
+def test_results_flag_tests_that_flip_on_unchanged_files(app_dir, tutorial_config):
+    State().initialize(str(tutorial_config))
+    state = State()
+    passing = {
+        "passed": 2,
+        "failed": 0,
+        "duration": 0.5,
+        "slowest": [{"name": "test_hello.py::test_io", "duration": 0.4}],
+        "failures": [],
+    }
+    failing = dict(
+        passing, passed=1, failed=1, failures=[{"name": "test_hello.py::test_io", "message": "boom"}]
+    )
+    state.record_lesson_result(1, 1, "digest", True, passing)
+    assert "flaky" not in state.get_lesson_result(1, 1)
+    state.record_lesson_result(1, 1, "digest", False, failing)
+    state = State()
+    assert state.get_lesson_result(1, 1)["flaky"] == ["test_hello.py::test_io"]
+    assert state.get_lesson_result(1, 1)["tests"]["failed"] == 1
+    assert next(state.iter_lessons())["flaky"]
+
+    state.record_lesson_result(1, 1, "new digest", False, failing)
+    assert "flaky" not in state.get_lesson_result(1, 1)
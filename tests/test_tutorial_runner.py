@@ -7,7 +7,6 @@ import pytest
 
 from click.testing import CliRunner
 
-from tutorial_runner import tutorial_runner
 from tutorial_runner import cli
 
 
@@ -30,9 +29,9 @@ def test_content(response):
 def test_command_line_interface():
     """Test the CLI."""
     runner = CliRunner()
-    result = runner.invoke(cli.main)
-    assert result.exit_code == 0
-    assert "tutorial_runner.cli.main" in result.output
-    help_result = runner.invoke(cli.main, ["--help"])
+    result = runner.invoke(cli.tutorial)
+    assert "Click tutorial runner." in result.output
+    help_result = runner.invoke(cli.tutorial, ["--help"])
     assert help_result.exit_code == 0
-    assert "--help  Show this message and exit." in help_result.output
+    assert "--help" in help_result.output
+    assert "Show this message and exit." in help_result.output
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for `tutorial_runner.verify`."""
+
+import json
+
+import pytoml
+
+from xml.etree import ElementTree
+
+from tutorial_runner import verify
+
+
+def test_verify_runs_each_solution_in_isolation(tutorial_config):
+    tutorial_dir = tutorial_config.parent
+    part01 = tutorial_dir / "part01"
+    (part01 / "hello.py").write_text("GREETING = None\n")
+    (part01 / "solutions" / "hello_01.py").write_text("GREETING = 'hello'\n")
+    (part01 / "solutions" / "hello_02.py").write_text("GREETING = 'goodbye'\n")
+    lesson_test = (
+        "from pathlib import Path\n\n"
+        "def test_greeting():\n"
+        "    source = (Path(__file__).parents[1] / 'hello.py').read_text()\n"
+        "    assert source == \"GREETING = '{}'\\n\"\n"
+    )
+    (part01 / "tests" / "test_01_hello.py").write_text(lesson_test.format("hello"))
+    (part01 / "tests" / "test_02_goodbye.py").write_text(lesson_test.format("bye"))
+    parts = pytoml.loads(tutorial_config.read_text())["parts"][:1]
+
+    results = list(verify.verify(verify.lesson_jobs(parts, str(tutorial_dir)), workers=2))
+
+    outcomes = {(r["part"], r["lesson"]): r["outcome"] for r in results}
+    assert outcomes == {(1, 1): "passed", (1, 2): "failed"}
+    assert (part01 / "hello.py").read_text() == "GREETING = None\n"
+    assert json.loads(verify.json_report(results))["failed"] == 1
+    suite = ElementTree.fromstring(verify.junit_report(results, "Sample"))
+    assert suite.get("failures") == "1"
+    assert len(suite.findall("testcase")) == 2
+
+
+def test_grade_checks_each_workspace(app_dir, tutorial_config, tmp_path):
+    from click.testing import CliRunner
+
+    from tutorial_runner import cli
+
+    part01 = tutorial_config.parent / "part01"
+    (part01 / "tests" / "test_01_hello.py").write_text(
+        "from pathlib import Path\n\n"
+        "def test_greeting():\n"
+        "    source = (Path(__file__).parents[1] / 'hello.py').read_text()\n"
+        "    assert 'hello' in source\n"
+    )
+    cohort = tmp_path / "cohort"
+    for learner, source in (("ada", "print('hello')\n"), ("bob", "print('bye')\n")):
+        (cohort / learner / "part01").mkdir(parents=True)
+        (cohort / learner / "part01" / "hello.py").write_text(source)
+    (cohort / "cy").mkdir()
+
+    runner = CliRunner()
+    runner.invoke(cli.tutorial, ["init", "-r"])
+    result = runner.invoke(
+        cli.tutorial, ["grade", "--lesson", "1.1", "-j", "2", str(cohort / "*")]
+    )
+    assert result.exit_code == 0, result.output
+    lines = result.output.splitlines()
+    assert lines[0] == "workspace,part,lesson,outcome,duration"
+    outcomes = {row.split(",")[0]: row.split(",")[3] for row in lines[1:4]}
+    assert outcomes == {
+        str(cohort / "ada"): "passed",
+        str(cohort / "bob"): "failed",
+        str(cohort / "cy"): "missing",
+    }
+
+    result = runner.invoke(
+        cli.tutorial, ["grade", "--lesson", "1.1", "--format", "json", str(cohort / "bob")]
+    )
+    report = json.loads(result.output.split("Graded")[0])
+    assert report[0]["outcome"] == "failed"
+    assert "assert 'hello' in" in report[0]["output"]
+
+
+def test_grade_stops_tests_after_default_timeout(app_dir, tutorial_config, tmp_path, monkeypatch):
+    from click.testing import CliRunner
+
+    from tutorial_runner import cli
+
+    (tutorial_config.parent / "part01" / "tests" / "test_01_hello.py").write_text(
+        "def test_forever():\n    while True:\n        pass\n"
+    )
+    workspace = tmp_path / "cohort" / "ada" / "part01"
+    workspace.mkdir(parents=True)
+    (workspace / "hello.py").write_text("print('hello')\n")
+    monkeypatch.setattr(cli, "GRADE_TIMEOUT", 1.0)
+
+    runner = CliRunner()
+    runner.invoke(cli.tutorial, ["init", "-r"])
+    result = runner.invoke(cli.tutorial, ["grade", "--lesson", "1.1", str(workspace.parent)])
+    assert result.output.splitlines()[1].split(",")[3] == "timeout"
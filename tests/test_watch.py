@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for `tutorial_runner.watch`."""
+
+import threading
+import time
+
+from click.testing import CliRunner
+
+from tutorial_runner import cli, daemon
+from tutorial_runner.state import State
+from tutorial_runner.watch import wait_for_change
+
+
+def test_wait_for_change_debounces_burst_of_saves(tmp_path):
+    watched = tmp_path / "hello.py"
+    other = tmp_path / "test_hello.py"
+    watched.write_text("print('hi')\n")
+    other.write_text("")
+
+    def save_repeatedly():
+        for count in range(5):
+            time.sleep(0.02)
+            watched.write_text("print('hi')\n" * (count + 2))
+
+    writer = threading.Thread(target=save_repeatedly)
+    writer.start()
+    changed = wait_for_change([watched, other], interval=0.01, debounce=0.1)
+    writer.join()
+    assert changed == [watched]
+    assert watched.read_text().count("\n") == 6
+
+
+def test_watch_moves_on_after_the_tests_pass(app_dir, tutorial_config, monkeypatch):
+    for name in ("test_01_hello.py", "test_02_goodbye.py"):
+        (tutorial_config.parent / "part01" / "tests" / name).write_text("def test_it():\n    pass\n")
+    runner = CliRunner()
+    runner.invoke(cli.tutorial, ["init", "-r"])
+
+    saved = []
+
+    def fake_wait_for_change(paths, interval, debounce):
+        if len(saved) == 2:
+            state = State()
+            saved.append((state.get_current_lesson_id(), state.get_lesson_status(1, 1)))
+            raise KeyboardInterrupt
+        saved.append([path.name for path in paths])
+
+    outcomes = iter([(False, None), (True, None)])
+
+    def refuse(*args, **kwargs):
+        raise OSError("no check server")
+
+    monkeypatch.setattr(cli, "wait_for_change", fake_wait_for_change)
+    monkeypatch.setattr(cli, "run_lesson", lambda *args: next(outcomes))
+    monkeypatch.setattr(daemon, "run_remote", refuse)
+
+    result = runner.invoke(cli.tutorial, ["watch"])
+    assert result.exit_code == 0, result.output
+    assert "Some tests failed. Waiting for changes..." in result.output
+    assert "Moving on to Part 1, Lesson 2!" in result.output
+    assert "Watching Part 01, Lesson 02 - Say goodbye" in result.output
+    assert saved[0] == ["hello.py", "test_01_hello.py"]
+    assert saved[2] == (2, "complete")
+    assert State().get_lesson_result(1, 1)["passed"] is True
@@ -0,0 +1,275 @@
+"""Storage backends for tutorial state."""
+
+import json
+import os
+
+import pytoml
+
+from codecs import open
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+from tutorial_runner.profiling import PROFILER
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+
+class Backend:
+    """Reads and writes the state dict for one learner.
+
+    ``write`` receives the full state plus the set of changed paths since the
+    last write, or ``None`` when the whole state should be replaced. Paths
+    are tuples such as ``("progress", "1.2")``, ``("current",)`` or
+    ``("name",)``.
+
+    ``State`` holds ``lock`` around every write so concurrent ``tutorial``
+    processes apply their changes one at a time.
+    """
+
+    path = None
+
+    @contextmanager
+    def lock(self):
+        """Hold an exclusive advisory lock on ``<path>.lock``."""
+        if fcntl is None:
+            yield
+            return
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        with open("{}.lock".format(self.path), mode="a") as lockfile:
+            fcntl.flock(lockfile.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lockfile.fileno(), fcntl.LOCK_UN)
+
+    def read(self):
+        """Return the state dict, raising ``FileNotFoundError`` if missing."""
+        raise NotImplementedError
+
+    def write(self, state, changed=None):
+        raise NotImplementedError
+
+
+class TomlBackend(Backend):
+    """The whole state in a single TOML document.
+
+    Partial writes re-read the file and apply only the changed paths, so
+    changes made by another process since this one loaded are kept. The
+    document is written to a temporary file and moved into place, so readers
+    never see a truncated file.
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+
+    def read(self):
+        with open(self.path, mode="r", encoding="utf-8") as statefile:
+            text = statefile.read()
+        PROFILER.count("state.bytes_read", len(text))
+        return pytoml.loads(text)
+
+    def write(self, state, changed=None):
+        if changed is not None:
+            try:
+                state = apply_changes(self.read(), state, changed)
+            except FileNotFoundError:
+                pass
+        import tempfile
+        fd, temp_path = tempfile.mkstemp(
+            dir=str(Path(self.path).parent), prefix=".tutorial-state.", suffix=".tmp"
+        )
+        try:
+            text = pytoml.dumps(state)
+            PROFILER.count("state.bytes_written", len(text))
+            with os.fdopen(fd, mode="w", encoding="utf-8") as statefile:
+                statefile.write(text)
+                statefile.flush()
+                os.fsync(statefile.fileno())
+            os.replace(temp_path, self.path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+
+def apply_changes(target, source, changed):
+    """Copy the ``changed`` paths from ``source`` into ``target``."""
+    for path in changed:
+        if len(path) == 1:
+            if path[0] in source:
+                target[path[0]] = source[path[0]]
+            else:
+                target.pop(path[0], None)
+        else:
+            section, key = path
+            if key in source.get(section, {}):
+                target.setdefault(section, {})[key] = source[section][key]
+            else:
+                target.get(section, {}).pop(key, None)
+    return target
+
+
+class SqliteBackend(Backend):
+    """State in an SQLite database with one row per lesson of progress.
+
+    Every row is keyed by ``learner``, so one database can hold the state of
+    many learners (see ``tutorial_runner.classroom``); a single-user database
+    uses the empty learner ID. Partial writes only touch the rows that
+    changed. If the learner has no state yet but ``migrate_from`` points at
+    an existing TOML state file, it is imported on first read and renamed
+    with a ``.migrated`` suffix.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS meta (
+            learner TEXT NOT NULL,
+            key TEXT NOT NULL,
+            value TEXT NOT NULL,
+            PRIMARY KEY (learner, key)
+        );
+        CREATE TABLE IF NOT EXISTS current (
+            learner TEXT PRIMARY KEY,
+            part INTEGER NOT NULL,
+            lesson INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS current_lesson ON current (part, lesson);
+        CREATE TABLE IF NOT EXISTS progress (
+            learner TEXT NOT NULL,
+            part INTEGER NOT NULL,
+            lesson INTEGER NOT NULL,
+            status TEXT NOT NULL,
+            updated_at TEXT NOT NULL,
+            PRIMARY KEY (learner, part, lesson)
+        );
+        CREATE INDEX IF NOT EXISTS progress_status ON progress (status, part, lesson);
+        CREATE TABLE IF NOT EXISTS results (
+            learner TEXT NOT NULL,
+            part INTEGER NOT NULL,
+            lesson INTEGER NOT NULL,
+            value TEXT NOT NULL,
+            PRIMARY KEY (learner, part, lesson)
+        );
+    """
+
+    def __init__(self, path, migrate_from=None, learner=""):
+        self.path = str(path)
+        self.migrate_from = migrate_from
+        self.learner = learner
+        self._connection = None
+
+    @property
+    def connection(self):
+        if self._connection is None:
+            import sqlite3
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(self.path, timeout=30)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.executescript(self.SCHEMA)
+        return self._connection
+
+    @contextmanager
+    def lock(self):
+        """SQLite serializes writers itself, so no extra lock file is needed."""
+        yield
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def read(self):
+        db = self.connection
+        learner = (self.learner,)
+        meta = {
+            key: json.loads(value)
+            for key, value in db.execute("SELECT key, value FROM meta WHERE learner = ?", learner)
+        }
+        if not meta:
+            return self._migrate()
+        state = dict(meta)
+        row = db.execute("SELECT part, lesson FROM current WHERE learner = ?", learner).fetchone()
+        if row is not None:
+            state["current"] = {"part": row[0], "lesson": row[1]}
+        state["progress"] = {
+            "{}.{}".format(part, lesson): status
+            for part, lesson, status in db.execute(
+                "SELECT part, lesson, status FROM progress WHERE learner = ?", learner
+            )
+        }
+        results = {
+            "{}.{}".format(part, lesson): json.loads(value)
+            for part, lesson, value in db.execute(
+                "SELECT part, lesson, value FROM results WHERE learner = ?", learner
+            )
+        }
+        if results:
+            state["results"] = results
+        return state
+
+    def write(self, state, changed=None):
+        now = datetime.now().isoformat()
+        learner = self.learner
+        with self.connection as db:
+            if changed is None:
+                for table in ("meta", "current", "progress", "results"):
+                    db.execute("DELETE FROM {} WHERE learner = ?".format(table), (learner,))
+                changed = [("current",)]
+                changed += [(key,) for key in state if key not in ("current", "progress", "results")]
+                changed += [("progress", key) for key in state.get("progress", {})]
+                changed += [("results", key) for key in state.get("results", {})]
+            for path in changed:
+                if path[0] == "progress":
+                    self._write_progress(db, path[1], state["progress"].get(path[1]), now)
+                elif path[0] == "results":
+                    self._write_result(db, path[1], state.get("results", {}).get(path[1]))
+                elif path[0] == "current":
+                    current = state.get("current", {})
+                    db.execute(
+                        "INSERT OR REPLACE INTO current (learner, part, lesson) VALUES (?, ?, ?)",
+                        (learner, current.get("part"), current.get("lesson")),
+                    )
+                elif path[0] in state:
+                    db.execute(
+                        "INSERT OR REPLACE INTO meta (learner, key, value) VALUES (?, ?, ?)",
+                        (learner, path[0], json.dumps(state[path[0]])),
+                    )
+                else:
+                    db.execute("DELETE FROM meta WHERE learner = ? AND key = ?", (learner, path[0]))
+
+    def _write_progress(self, db, key, status, now):
+        part, lesson = (int(value) for value in key.split("."))
+        if status is None:
+            db.execute(
+                "DELETE FROM progress WHERE learner = ? AND part = ? AND lesson = ?",
+                (self.learner, part, lesson),
+            )
+        else:
+            db.execute(
+                "INSERT OR REPLACE INTO progress (learner, part, lesson, status, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (self.learner, part, lesson, status, now),
+            )
+
+    def _write_result(self, db, key, result):
+        part, lesson = (int(value) for value in key.split("."))
+        if result is None:
+            db.execute(
+                "DELETE FROM results WHERE learner = ? AND part = ? AND lesson = ?",
+                (self.learner, part, lesson),
+            )
+        else:
+            db.execute(
+                "INSERT OR REPLACE INTO results (learner, part, lesson, value) VALUES (?, ?, ?, ?)",
+                (self.learner, part, lesson, json.dumps(result)),
+            )
+
+    def _migrate(self):
+        if self.migrate_from is None or not Path(str(self.migrate_from)).exists():
+            raise FileNotFoundError("No tutorial state in {}".format(self.path))
+        state = TomlBackend(self.migrate_from).read()
+        self.write(state)
+        os.replace(str(self.migrate_from), "{}.migrated".format(self.migrate_from))
+        return state
@@ -0,0 +1,72 @@
+"""Classroom mode: many learners' progress in one shared SQLite store.
+
+Set ``TUTORIAL_CLASSROOM`` to the path of a shared database to switch every
+``tutorial`` command to it. Learners are told apart by ``TUTORIAL_LEARNER``
+(defaulting to the login name), and the compiled course index is shared in a
+``courses`` directory next to the database instead of being copied per user.
+"""
+
+import getpass
+import os
+
+from pathlib import Path
+
+from tutorial_runner.backends import SqliteBackend
+
+CLASSROOM_ENV_VAR = "TUTORIAL_CLASSROOM"
+LEARNER_ENV_VAR = "TUTORIAL_LEARNER"
+
+
+def classroom_path():
+    """Return the shared classroom database path, or None outside classroom mode."""
+    return os.environ.get(CLASSROOM_ENV_VAR) or None
+
+
+def learner_id():
+    return os.environ.get(LEARNER_ENV_VAR) or getpass.getuser()
+
+
+def course_cache_dir(path):
+    return str(Path(path).resolve().parent / "courses")
+
+
+class Classroom:
+    """Read-only aggregate queries over a classroom database."""
+
+    def __init__(self, path):
+        self.backend = SqliteBackend(path)
+
+    def lesson_summary(self, part_id=None, lesson_id=None):
+        """Count learners currently on, and done with, each lesson.
+
+        Returns ``(part, lesson, working, completed)`` rows in course order
+        from a single query over the ``current`` and ``progress`` indexes.
+        """
+        conditions = []
+        params = []
+        if part_id is not None:
+            conditions.append("part = ?")
+            params.append(part_id)
+        if lesson_id is not None:
+            conditions.append("lesson = ?")
+            params.append(lesson_id)
+        where = " AND ".join(conditions) or "1"
+        query = """
+            SELECT part, lesson, SUM(kind = 'current'), SUM(kind = 'complete') FROM (
+                SELECT part, lesson, 'current' AS kind FROM current WHERE {where}
+                UNION ALL
+                SELECT part, lesson, 'complete' AS kind FROM progress
+                WHERE status = 'complete' AND {where}
+            )
+            GROUP BY part, lesson
+            ORDER BY part, lesson
+        """.format(where=where)
+        return self.backend.connection.execute(query, params * 2).fetchall()
+
+    def learners_on(self, part_id, lesson_id):
+        """Return the learners whose current lesson is ``part_id.lesson_id``."""
+        rows = self.backend.connection.execute(
+            "SELECT learner FROM current WHERE part = ? AND lesson = ? ORDER BY learner",
+            (part_id, lesson_id),
+        )
+        return [row[0] for row in rows]
@@ -1,21 +1,76 @@
+import itertools
 import sys
+import time
 import click
-import pkg_resources
-import pytest
-import shutil
 
-from datetime import datetime
 from pathlib import Path
 
+# Keep module-level imports light: pytest, shutil and friends are imported
+# inside the commands that need them so `tutorial status` starts quickly.
+from tutorial_runner import __version__
+from tutorial_runner.course import load_config
+from tutorial_runner.events import EVENTS, EVENTS_ENV_VAR, sink_from_url
+from tutorial_runner.profiling import PROFILER
+from tutorial_runner.render import highlighted, iter_file
+from tutorial_runner.runner import (
+    CollectionCache,
+    lesson_args,
+    lesson_digest,
+    lesson_limits,
+    lesson_paths,
+    lesson_selection,
+    run_isolated,
+    summarize_tests,
+)
 from tutorial_runner.state import State
+from tutorial_runner.watch import wait_for_change
 
 
 @click.group(name='tutorial-runner')
 @click.pass_context
-def tutorial(ctx):
+@click.option(
+    "--profile",
+    is_flag=True,
+    envvar="TUTORIAL_PROFILE",
+    help="Print per-phase timings and append them to profile.jsonl in the app dir.",
+)
+@click.option(
+    "--profile-dump",
+    type=click.Path(dir_okay=False, writable=True),
+    help="Also write cProfile stats for the command to this file.",
+)
+@click.option(
+    "--events",
+    metavar="URL",
+    envvar=EVENTS_ENV_VAR,
+    help="Send progress events to a JSONL file, unix:// socket or http(s):// endpoint.",
+)
+def tutorial(ctx, profile, profile_dump, events):
     """Click tutorial runner."""
     ctx.ensure_object(dict)
-    ctx.obj["state"] = State()
+    # `tutorial shell` and `tutorial batch` pass the same obj to every command.
+    state = ctx.obj.get("state") or State()
+    if events and not EVENTS.enabled:
+        from tutorial_runner.classroom import learner_id
+
+        try:
+            sink = sink_from_url(events)
+        except ValueError as e:
+            raise click.BadParameter(str(e), param_hint="--events")
+        EVENTS.start(sink, context={"learner": learner_id(), "command": ctx.invoked_subcommand})
+        ctx.call_on_close(EVENTS.close)
+    if profile or profile_dump:
+        PROFILER.start(ctx.invoked_subcommand, dump_path=profile_dump)
+        ctx.call_on_close(lambda: finish_profile(state))
+    state.begin_session()
+    ctx.call_on_close(state.end_session)
+    ctx.obj["state"] = state
+
+
+def finish_profile(state):
+    record = PROFILER.finish(Path(state.app_dir, "profile.jsonl"))
+    click.echo("\n" + PROFILER.summary(record), err=True)
+
 
 @tutorial.command()
 @click.pass_obj
@@ -43,6 +98,39 @@ def init(obj, config, reinitialize):
     click.echo("Tutorial initialized! Time to start your first lesson!")
 
 
+@tutorial.command()
+@click.pass_obj
+@click.option(
+    "--config",
+    type=click.Path(exists=True, dir_okay=False),
+    help="Tutorial configuration file (defaults to the one initialized with).",
+)
+def sync(obj, config):
+    """Update the tutorial after its config changed, keeping progress"""
+    state = obj["state"]
+    diff = state.sync(config)
+    if not diff:
+        click.echo("Tutorial is up to date.")
+        return
+    click.echo(
+        "Tutorial updated: {} lessons added, {} removed, {} changed.".format(
+            len(diff.added), len(diff.removed), len(diff.changed)
+        )
+    )
+    if diff.changed_parts:
+        click.echo(
+            "Check results cleared for parts: {}".format(
+                ", ".join("{:02d}".format(part_id) for part_id in sorted(diff.changed_parts))
+            )
+        )
+    lesson = state.get_current_lesson()
+    click.echo(
+        "Current lesson: Part {:02d}, Lesson {:02d}: {}".format(
+            lesson["part"]["id"], lesson["id"], lesson["name"]
+        )
+    )
+
+
 @tutorial.command()
 @click.pass_obj
 @click.option(
@@ -56,92 +144,221 @@ def lesson(obj, lesson_id, part_id):
     state = obj["state"]
     if lesson_id is None:
         if part_id is not None:
-            lesson_id = 1
+            lesson_id = state.get_first_lesson_id(part_id)
         else:
           lesson_id = state.get_current_lesson_id()
     if part_id is None:
         part_id = state.get_current_part_id()
     state.set_current_lesson(part_id, lesson_id)
-    lesson = state.get_current_lesson()
-    if lesson["part"].get("file"):
-        working_path = Path(
-            lesson["tutorial_dir"], lesson["part"]["dir"], lesson["part"]["file"]
-        ).relative_to(Path.cwd())
-    else:
-        working_path = 'n/a'
-    if lesson.get("test"):
-        test_path = Path(
-            lesson["tutorial_dir"], lesson["part"]["dir"], 'tests', lesson["test"]
-        ).relative_to(Path.cwd())
-    else:
-        test_path = 'n/a'
-    click.echo("Currently working on Part {:02d}, Lesson {:02d} - {}".format(part_id, lesson_id, lesson['name']))
-    click.echo("\nWorking file: {}".format(working_path))
-    click.echo("   Test file: {}".format(test_path))
-    if lesson["part"].get("command"):
-        click.echo("     Command: {}".format(lesson["part"]["command"]))
-    if lesson.get("doc-urls"):
-        click.echo("Related docs: {}".format(lesson.get('doc-urls')))
-    if lesson.get("objectives"):
-        click.echo("\nObjectives:\n{}".format(lesson.get('objectives')))
+    click.echo(state.get_lesson_card(part_id, lesson_id, Path.cwd()))
 
 
 @tutorial.command()
 @click.pass_obj
-def status(obj):
+@click.option("--part-id", "-p", type=click.INT, help="Only list lessons in this part.")
+@click.option("--incomplete", is_flag=True, help="Hide completed lessons.")
+@click.option("--limit", type=click.INT, help="List at most this many lessons.")
+@click.option(
+    "--format",
+    "output_format",
+    type=click.Choice(["text", "json", "tsv"]),
+    default="text",
+    show_default=True,
+    help="Output format; json and tsv list lessons only.",
+)
+def status(obj, part_id, incomplete, limit, output_format):
     """Show the status of your progress."""
     state = obj["state"]
-    lesson = state.get_current_lesson()
-    click.echo("Current lesson\n--------------\n")
-    click.echo(
-        "Part {:02d}, Lesson {:02d}: {}".format(
-            lesson["part"]["id"], lesson["id"], lesson["name"]
+    rows = state.iter_lessons(part_id=part_id, incomplete=incomplete)
+    if limit is not None:
+        rows = itertools.islice(rows, limit)
+    if output_format == "text":
+        lesson = state.get_current_lesson()
+        click.echo("Current lesson\n--------------\n")
+        click.echo(
+            "Part {:02d}, Lesson {:02d}: {}".format(
+                lesson["part"]["id"], lesson["id"], lesson["name"]
+            )
         )
-    )
-    click.echo(" Tutorial base dir: {}".format(lesson["tutorial_dir"]))
-    click.echo("       Working dir: {}".format(lesson["part"]["dir"]))
-    if lesson["part"].get("file"):
-        click.echo("      Working file: {}".format(lesson["part"]["file"]))
-    parts = state.list_parts()
-    click.echo("\nAll lessons\n-----------")
-    for part in parts:
-        click.echo("\n-- Part {id:02d} - {name} --".format(**part))
-        for lesson in part["lessons"]:
-            lesson["_status"] = state.get_lesson_status(part["id"], lesson["id"])
-            click.echo("{id:02d} - {name:20} - {_status}".format(**lesson))
-
-
-def run_lesson(lesson_test_file):
+        click.echo(" Tutorial base dir: {}".format(lesson["tutorial_dir"]))
+        click.echo("       Working dir: {}".format(lesson["part"]["dir"]))
+        if lesson["part"].get("file"):
+            click.echo("      Working file: {}".format(lesson["part"]["file"]))
+        click.echo("\nAll lessons\n-----------")
+    render = {"text": render_text, "json": render_json, "tsv": render_tsv}[output_format]
+    with PROFILER.phase("render"):
+        for line in render(rows):
+            click.echo(line)
+
+
+SLOW_CHECK_SECONDS = 2.0
+
+
+def render_text(rows):
+    part_id = None
+    for row in rows:
+        if row["part"] != part_id:
+            part_id = row["part"]
+            yield "\n-- Part {part:02d} - {part_name} --".format(**row)
+        status = row["status"]
+        if row["passing_since"]:
+            status += " (passing since {})".format(row["passing_since"])
+        if row["duration"] is not None and row["duration"] >= SLOW_CHECK_SECONDS:
+            status += " (slow: {:.1f}s)".format(row["duration"])
+        if row["flaky"]:
+            status += " (flaky)"
+        yield "{lesson:02d} - {name:20} - {0}".format(status, **row)
+
+
+def render_json(rows):
+    """Stream rows as a JSON array, one element per line."""
+    import json
+
+    separator = "["
+    for row in rows:
+        yield separator + json.dumps(row)
+        separator = ","
+    yield "[]" if separator == "[" else "]"
+
+
+def render_tsv(rows):
+    columns = ("part", "lesson", "status", "passing_since", "duration", "flaky", "name")
+    yield "\t".join(columns)
+    for row in rows:
+        yield "\t".join(
+            "" if row[column] is None else str(row[column]).replace("\t", " ") for column in columns
+        )
+
+
+def collection_cache(state):
+    return CollectionCache(Path(state.app_dir, "collection"))
+
+
+def run_lesson(lesson_test_file, limits=None, selection=None, cache=None):
+    """Run a lesson's tests and return whether they passed and a summary of them.
+
+    The summary (see ``summarize_tests``) is ``None`` if the child reported
+    no test results.
+    """
+    args, key = lesson_args(lesson_test_file, selection, cache)
+    return finish_run(run_isolated(args, limits=limits), limits, key, cache)
+
+
+def finish_run(run, limits=None, key=None, cache=None):
+    """Report a ``RunResult``, cache its collected nodes and summarize it like ``run_lesson``."""
+    report_run(run, limits)
+    if key is not None and run.exit_code in (0, 1) and run.report.get("nodes"):
+        cache.put(key, run.report["nodes"])
+    tests = run.report.get("tests")
+    return run.exit_code == 0, summarize_tests(tests) if tests else None
+
+
+def report_run(run, limits=None):
+    if run.timed_out:
+        click.secho(
+            "Tests were stopped after running for {} seconds.".format(limits["timeout"]),
+            fg="red",
+        )
+    summary = "Tests ran for {:.2f}s".format(run.duration)
+    if run.peak_memory is not None:
+        summary += " using at most {:.1f} MB of memory".format(run.peak_memory)
+    click.echo(summary + ".")
+
+
+def report_cached_failures(cached):
+    failures = cached.get("tests", {}).get("failures", [])
+    if not failures:
+        click.echo("The tests failed last time. Use --force to see their output again.")
+        return
+    click.echo("The tests failed last time:")
+    for failure in failures:
+        click.secho("  {}".format(failure["name"]), fg="red")
+        if failure.get("message"):
+            click.echo("    {}".format(failure["message"]))
+
+
+def run_lesson_on_daemon(app_dir, lesson_test_file, limits=None, selection=None, cache=None):
+    from tutorial_runner import daemon
+
+    args, key = lesson_args(lesson_test_file, selection, cache)
     try:
-        import pytest_clarity
-        extra_args = ['--diff-type=unified', '--no-hints']
-    except ImportError:
-        extra_args = []
-    pytest_args = extra_args + ["--disable-pytest-warnings", "-vx", "{0}".format(lesson_test_file)]
-    result = pytest.main(pytest_args)
-    if result == 0:
-        return True
-    else:
-        return False
+        run = daemon.run_remote(daemon.socket_path(app_dir), args, limits=limits)
+    except OSError:
+        click.secho(
+            "Check server is not running (start it with `tutorial serve`). Running tests directly.",
+            fg="yellow",
+            err=True,
+        )
+        return run_lesson(lesson_test_file, limits, selection, cache)
+    return finish_run(run, limits, key, cache)
 
 
 @tutorial.command()
 @click.pass_obj
 @click.pass_context
-def check(ctx, obj):
+@click.option(
+    "--daemon",
+    "-d",
+    "use_daemon",
+    is_flag=True,
+    help="Run the tests on the check server started by `tutorial serve`.",
+)
+@click.option(
+    "--force",
+    "-f",
+    is_flag=True,
+    help="Run the tests even if nothing changed since the last check.",
+)
+@click.option(
+    "--timeout",
+    type=click.FLOAT,
+    help="Stop the tests after this many seconds (overrides tutorial.toml).",
+)
+@click.option(
+    "--prewarm",
+    is_flag=True,
+    envvar="TUTORIAL_PREWARM",
+    help="After passing, get the next lesson's files and tests ready in the background.",
+)
+def check(ctx, obj, use_daemon, force, timeout, prewarm):
     """Check your work for the current lesson."""
     state = obj["state"]
     current_lesson = state.get_current_lesson()
-    if current_lesson.get("test"):        
-        test_path = str(
-            Path(
-                current_lesson["tutorial_dir"],
-                current_lesson["part"]["dir"],
-                "tests",
-                current_lesson["test"],
+    _, test_path, _ = lesson_paths(current_lesson)
+    if test_path is not None:
+        digest = lesson_digest(current_lesson)
+        cached = state.get_lesson_result(current_lesson["part"]["id"], current_lesson["id"])
+        if not force and cached is not None and cached["digest"] == digest:
+            click.echo(
+                "Nothing changed since the last check at {}. Use --force to run the tests again.".format(
+                    cached["checked_at"]
+                )
+            )
+            result = cached["passed"]
+            if not result:
+                report_cached_failures(cached)
+        else:
+            limits = lesson_limits(current_lesson)
+            if timeout is not None:
+                limits["timeout"] = timeout
+            selection = lesson_selection(current_lesson)
+            cache = collection_cache(state)
+            started = time.perf_counter()
+            if use_daemon:
+                result, summary = run_lesson_on_daemon(
+                    state.app_dir, str(test_path), limits, selection, cache
+                )
+            else:
+                result, summary = run_lesson(str(test_path), limits, selection, cache)
+            EVENTS.emit(
+                "check_passed" if result else "check_failed",
+                part=current_lesson["part"]["id"],
+                lesson=current_lesson["id"],
+                duration=round(time.perf_counter() - started, 3),
+            )
+            state.record_lesson_result(
+                current_lesson["part"]["id"], current_lesson["id"], digest, result, summary
             )
-        )
-        result = run_lesson(test_path)
     else:
         result = True
     if result:
@@ -152,6 +369,8 @@ def check(ctx, obj):
         if next_lesson is not None:
             click.echo("Ready to proceed to Part {}, Lesson {}!".format(*next_lesson))
             click.echo("Continue by running `tutorial lesson`")
+            if prewarm:
+                prewarm_lesson(state)
         else:
             click.echo("Last lesson complete!")
     else:
@@ -162,69 +381,497 @@ def check(ctx, obj):
         sys.exit(1)
 
 
+def prewarm_lesson(state):
+    """Warn about missing files of the current lesson and warm it up in the background."""
+    from tutorial_runner import prewarm
+
+    lesson = state.get_current_lesson()
+    missing = prewarm.missing_files(lesson)
+    if missing:
+        click.secho(
+            "The next lesson is missing files: {}".format(", ".join(str(path) for path in missing)),
+            fg="yellow",
+            err=True,
+        )
+    prewarm.in_background(lesson, collection_cache(state))
+
+
 @tutorial.command()
 @click.pass_obj
-def peek(obj):
-    """Look at the solution file without overwriting your work."""
+@click.option(
+    "--interval",
+    type=click.FLOAT,
+    default=0.5,
+    show_default=True,
+    help="Seconds between checks for changed files.",
+)
+@click.option(
+    "--debounce",
+    type=click.FLOAT,
+    default=0.3,
+    show_default=True,
+    help="Seconds files must stay unchanged before tests run.",
+)
+def watch(obj, interval, debounce):
+    """Re-run the current lesson's tests whenever you save."""
+    from tutorial_runner import daemon
+
     state = obj["state"]
-    lesson = state.get_current_lesson()
-    if lesson.get("solution"):
-        solution_path = str(
-            Path(
-                lesson["tutorial_dir"],
-                lesson["part"]["dir"],
-                "solutions",
-                lesson["solution"],
+    socket_path = daemon.socket_path(state.app_dir)
+    while True:
+        lesson = state.get_current_lesson()
+        working_path, test_path, _ = lesson_paths(lesson)
+        if test_path is None:
+            click.echo("This lesson has no tests. Run `tutorial check` to proceed.")
+            return
+        click.echo(
+            "Watching Part {:02d}, Lesson {:02d} - {} (Ctrl-C to stop)".format(
+                lesson["part"]["id"], lesson["id"], lesson["name"]
             )
         )
-        with open(solution_path) as solutionfile:
-            solution_source = solutionfile.read()
-        click.echo("Solution in {}:\n --------------------".format(solution_path))
-        click.echo(solution_source)
-        click.echo(" --------------------\n")
+        passed = False
+        while not passed:
+            try:
+                wait_for_change([p for p in (working_path, test_path) if p], interval, debounce)
+            except KeyboardInterrupt:
+                return
+            limits = lesson_limits(lesson)
+            selection = lesson_selection(lesson)
+            cache = collection_cache(state)
+            args, key = lesson_args(str(test_path), selection, cache)
+            started = time.perf_counter()
+            try:
+                run = daemon.run_remote(socket_path, args, limits=limits)
+                passed, summary = finish_run(run, limits, key, cache)
+            except OSError:
+                passed, summary = run_lesson(str(test_path), limits, selection, cache)
+            EVENTS.emit(
+                "check_passed" if passed else "check_failed",
+                part=lesson["part"]["id"],
+                lesson=lesson["id"],
+                duration=round(time.perf_counter() - started, 3),
+            )
+            state.record_lesson_result(
+                lesson["part"]["id"], lesson["id"], lesson_digest(lesson), passed, summary
+            )
+            if not passed:
+                click.secho("Some tests failed. Waiting for changes...", fg="red")
+        click.secho("All tests passed!", fg="green")
+        next_lesson = state.complete_lesson(lesson["part"]["id"], lesson["id"])
+        state.flush()
+        if next_lesson is None:
+            click.echo("Last lesson complete!")
+            return
+        click.echo("Moving on to Part {}, Lesson {}!\n".format(*next_lesson))
+
+
+@tutorial.command()
+@click.pass_obj
+@click.option(
+    "--config",
+    type=click.Path(exists=True, dir_okay=False),
+    help="Tutorial configuration file (defaults to the initialized tutorial).",
+)
+@click.option(
+    "--jobs", "-j", type=click.INT, help="Number of lessons to check in parallel."
+)
+@click.option(
+    "--junit-xml",
+    type=click.Path(dir_okay=False, writable=True),
+    help="Write a JUnit XML report to this file.",
+)
+@click.option(
+    "--json",
+    "json_path",
+    type=click.Path(dir_okay=False, writable=True),
+    help="Write a JSON report to this file.",
+)
+def verify(obj, config, jobs, junit_xml, json_path):
+    """Check every lesson's solution against its tests."""
+    from tutorial_runner import verify as verification
+
+    state = obj["state"]
+    if config is not None:
+        config_data, _ = load_config(config, state.course_cache_dir)
+        tutorial_dir = str(Path(config).resolve().parent)
     else:
+        config_data = state.load_config()
+        tutorial_dir = state.load()["tutorial_dir"]
+    jobs_to_run = verification.lesson_jobs(config_data["parts"], tutorial_dir)
+    order = {(job["part"], job["lesson"]): index for index, job in enumerate(jobs_to_run)}
+    results = []
+    for result in verification.verify(jobs_to_run, workers=jobs):
+        results.append(result)
+        color = {"passed": "green", "failed": "red"}.get(result["outcome"])
+        click.secho(
+            "Part {part:02d}, Lesson {lesson:02d} - {name:20} {outcome:7} {duration:7.2f}s".format(**result),
+            fg=color,
+        )
+    results.sort(key=lambda r: order[(r["part"], r["lesson"])])
+    if junit_xml:
+        Path(junit_xml).write_text(verification.junit_report(results, config_data.get("name")))
+    if json_path:
+        Path(json_path).write_text(verification.json_report(results))
+    failed = [r for r in results if r["outcome"] == "failed"]
+    click.echo(
+        "\n{} passed, {} failed, {} skipped".format(
+            sum(1 for r in results if r["outcome"] == "passed"),
+            len(failed),
+            sum(1 for r in results if r["outcome"] == "skipped"),
+        )
+    )
+    if failed:
+        sys.exit(1)
+
+
+GRADE_COLUMNS = ("workspace", "part", "lesson", "outcome", "duration")
+GRADE_TIMEOUT = 60.0
+
+
+@tutorial.command()
+@click.pass_obj
+@click.option(
+    "--lesson",
+    "lesson_key",
+    required=True,
+    metavar="P.L",
+    help="Part and lesson ID of the lesson to grade, such as 2.3.",
+)
+@click.argument("workspaces", nargs=-1, required=True)
+@click.option(
+    "--config",
+    type=click.Path(exists=True, dir_okay=False),
+    help="Tutorial configuration file (defaults to the initialized tutorial).",
+)
+@click.option(
+    "--jobs", "-j", type=click.INT, help="Number of workspaces to check in parallel."
+)
+@click.option(
+    "--timeout",
+    type=click.FLOAT,
+    help="Stop each workspace's tests after this many seconds (overrides tutorial.toml; "
+    "defaults to {:g} if neither sets one).".format(GRADE_TIMEOUT),
+)
+@click.option(
+    "--format",
+    "output_format",
+    type=click.Choice(["csv", "json"]),
+    default="csv",
+    show_default=True,
+    help="Report format; json also includes the pytest output.",
+)
+@click.option(
+    "--output",
+    "-o",
+    type=click.File("w"),
+    default="-",
+    help="Write the report to this file instead of stdout.",
+)
+def grade(obj, lesson_key, workspaces, config, jobs, timeout, output_format, output):
+    """Check a lesson in many learner workspaces.
+
+    WORKSPACES are directories or working files, and may be glob patterns.
+    Each one is tested in its own temporary copy of the lesson's part, and
+    results are written as they come in.
+    """
+    import csv
+    import glob
+
+    from tutorial_runner import verify as verification
+
+    state = obj["state"]
+    if config is not None:
+        config_data, _ = load_config(config, state.course_cache_dir)
+        tutorial_dir = str(Path(config).resolve().parent)
+    else:
+        config_data = state.load_config()
+        tutorial_dir = state.load()["tutorial_dir"]
+    try:
+        part_id, lesson_id = (int(value) for value in lesson_key.split("."))
+    except ValueError:
+        raise click.BadParameter("Use the form PART.LESSON, such as 2.3.", param_hint="--lesson")
+    lesson_jobs = verification.lesson_jobs(config_data["parts"], tutorial_dir)
+    job = next((j for j in lesson_jobs if (j["part"], j["lesson"]) == (part_id, lesson_id)), None)
+    if job is None:
+        raise click.ClickException("Lesson {} not found in the tutorial.".format(lesson_key))
+    if not (job["test"] and job["file"]):
+        raise click.ClickException("Lesson {} has no test to grade with.".format(lesson_key))
+    if timeout is not None:
+        job["limits"]["timeout"] = timeout
+    else:
+        job["limits"].setdefault("timeout", GRADE_TIMEOUT)
+    paths = []
+    for pattern in workspaces:
+        paths.extend(sorted(glob.glob(pattern)) or [pattern])
+    grade_jobs = [dict(job, workspace=path) for path in paths]
+
+    counts = {}
+
+    def counted(results):
+        for result in results:
+            counts[result["outcome"]] = counts.get(result["outcome"], 0) + 1
+            yield result
+
+    results = counted(
+        verification.verify(grade_jobs, workers=jobs, function=verification.grade_job)
+    )
+    if output_format == "csv":
+        writer = csv.writer(output)
+        writer.writerow(GRADE_COLUMNS)
+        for result in results:
+            writer.writerow([result[column] for column in GRADE_COLUMNS])
+            output.flush()
+    else:
+        for line in render_json(results):
+            click.echo(line, file=output)
+            output.flush()
+    click.echo(
+        "Graded {} workspaces: {}".format(
+            len(grade_jobs),
+            ", ".join("{} {}".format(count, outcome) for outcome, count in sorted(counts.items())),
+        ),
+        err=True,
+    )
+
+
+@tutorial.group()
+@click.option(
+    "--store",
+    envvar="TUTORIAL_CLASSROOM",
+    required=True,
+    type=click.Path(dir_okay=False),
+    help="Shared classroom database (defaults to $TUTORIAL_CLASSROOM).",
+)
+@click.pass_obj
+def classroom(obj, store):
+    """Instructor commands for a shared classroom."""
+    from tutorial_runner.classroom import Classroom
+
+    if not Path(store).exists():
+        raise click.ClickException("Classroom store not found: {}".format(store))
+    obj["classroom"] = Classroom(store)
+
+
+@classroom.command(name="progress")
+@click.pass_obj
+@click.option("--part-id", "-p", type=click.INT, help="Only show this part.")
+@click.option("--lesson-id", "-l", type=click.INT, help="Only show this lesson.")
+@click.option(
+    "--learners",
+    is_flag=True,
+    help="List the learners currently working on each lesson.",
+)
+@click.option(
+    "--config",
+    type=click.Path(exists=True, dir_okay=False),
+    help="Tutorial configuration file, for lesson names.",
+)
+def classroom_progress(obj, part_id, lesson_id, learners, config):
+    """Show how many learners are on and past each lesson."""
+    room = obj["classroom"]
+    names = {}
+    if config is not None:
+        config_data, _ = load_config(config, obj["state"].course_cache_dir)
+        for part in config_data["parts"]:
+            for lesson in part.get("lessons", []):
+                names[(part["id"], lesson["id"])] = lesson.get("name", "")
+    click.echo("Part  Lesson  Working  Completed  Name")
+    for part, lesson, working, completed in room.lesson_summary(part_id, lesson_id):
+        click.echo(
+            "{:4d}  {:6d}  {:7d}  {:9d}  {}".format(
+                part, lesson, working, completed, names.get((part, lesson), "")
+            )
+        )
+        if learners and working:
+            click.echo("      " + ", ".join(room.learners_on(part, lesson)))
+
+
+@tutorial.command()
+@click.pass_obj
+def serve(obj):
+    """Keep pytest loaded for fast `tutorial check --daemon` runs."""
+    from tutorial_runner import daemon
+
+    path = daemon.socket_path(obj["state"].app_dir)
+    try:
+        daemon.serve(
+            path, ready=lambda: click.echo("Check server listening on {} (Ctrl-C to stop)".format(path))
+        )
+    except RuntimeError as e:
+        raise click.ClickException(str(e))
+    except KeyboardInterrupt:
+        click.echo("\nCheck server stopped.")
+
+
+@tutorial.command()
+@click.pass_obj
+@click.option(
+    "--pager/--no-pager",
+    default=None,
+    help="Page the output (default: when writing to a terminal).",
+)
+@click.option(
+    "--color/--no-color",
+    default=None,
+    help="Syntax-highlight the solution if pygments is installed (default: on a terminal).",
+)
+def peek(obj, pager, color):
+    """Look at the solution file without overwriting your work."""
+    state = obj["state"]
+    lesson = state.get_current_lesson()
+    _, _, solution_path = lesson_paths(lesson)
+    if solution_path is None:
         click.echo("No solution file for this lesson.")
+        return
+    interactive = sys.stdout.isatty()
+    chunks = iter_file(solution_path)
+    if color if color is not None else interactive:
+        chunks = highlighted(solution_path, chunks)
+    output = itertools.chain(
+        ["Solution in {}:\n --------------------\n".format(solution_path)],
+        chunks,
+        ["\n --------------------\n\n"],
+    )
+    if pager if pager is not None else interactive:
+        click.echo_via_pager(output, color=color)
+    else:
+        for chunk in output:
+            click.echo(chunk, nl=False, color=color)
+    EVENTS.emit("solution_peeked", part=lesson["part"]["id"], lesson=lesson["id"])
+
 
 @tutorial.command()
 @click.pass_obj
 @click.option('--yes', '-y', is_flag=True)
 def solve(obj, yes):
     """Copy the solution file to the working file."""
+    import shutil
+
     state = obj["state"]
     lesson = state.get_current_lesson()
     if not lesson.get("solution"):
         click.echo("No solution file for this lesson. Just run `tutorial check` to proceed.")
         return
-    solution_path = Path(
-        lesson["tutorial_dir"], lesson["part"]["dir"], "solutions", lesson["solution"]
-    )
-    working_path = Path(
-        lesson["tutorial_dir"], lesson["part"]["dir"], lesson["part"]["file"]
-    )
-    backup_filename = lesson["part"]["file"].replace(
-        ".py", ".{}.py".format(datetime.now().strftime("%Y-%m-%d.%H-%M-%S"))
-    )
-    backup_path = Path(
-        lesson["tutorial_dir"], lesson["part"]["dir"], backup_filename
-    )
+    working_path, _, solution_path = lesson_paths(lesson)
     click.echo(
-        "This will make a backup of the working file and then copy the solution file into place."
+        "This will save a snapshot of the working file and then copy the solution file into place."
     )
     click.echo("  Working file: {}".format(working_path.relative_to(Path.cwd())))
-    click.echo("   Backup file: {}".format(backup_path.relative_to(Path.cwd())))
     click.echo(" Solution file: {}".format(solution_path.relative_to(Path.cwd())))
     if not yes:
         click.confirm("Do you wish to proceed?", abort=True)
-    click.echo("Making backup file: {}".format(backup_path))
-    shutil.copy(str(working_path), str(backup_path))
+    if working_path.exists():
+        entry = state.snapshots.save(
+            working_path, "solve", part=lesson["part"]["id"], lesson=lesson["id"]
+        )
+        click.echo(
+            "Saved your work as snapshot {0}. Use `tutorial restore {0}` to get it back.".format(
+                entry["digest"][:SHORT_DIGEST]
+            )
+        )
     click.echo("Copying solution into place...")
     shutil.copy(str(solution_path), str(working_path))
+    EVENTS.emit("solution_applied", part=lesson["part"]["id"], lesson=lesson["id"])
     click.echo("You may now complete the lesson by running `tutorial check`.")
 
+
+SHORT_DIGEST = 10
+
+
+def working_file(state):
+    lesson = state.get_current_lesson()
+    working_path, _, _ = lesson_paths(lesson)
+    if working_path is None:
+        raise click.ClickException("The current lesson has no working file.")
+    return lesson, working_path
+
+
+@tutorial.command()
+@click.pass_obj
+def history(obj):
+    """List saved versions of the current working file."""
+    state = obj["state"]
+    _, working_path = working_file(state)
+    entries = state.snapshots.history(working_path)
+    if not entries:
+        click.echo("No snapshots of {} yet.".format(working_path))
+        return
+    click.echo("Snapshots of {}:".format(working_path))
+    for number, entry in enumerate(entries, 1):
+        where = ""
+        if entry.get("part") is not None:
+            where = "  (Part {:02d}, Lesson {:02d})".format(entry["part"], entry["lesson"])
+        click.echo(
+            "{:3d}  {}  {}  {:8d} bytes  {:8}{}".format(
+                number,
+                entry["digest"][:SHORT_DIGEST],
+                entry["time"],
+                entry["size"],
+                entry["reason"],
+                where,
+            )
+        )
+
+
+@tutorial.command()
+@click.pass_obj
+@click.argument("snapshot")
+@click.option('--yes', '-y', is_flag=True)
+def restore(obj, snapshot, yes):
+    """Put a saved version of the working file back.
+
+    SNAPSHOT is a number or digest prefix from `tutorial history`. The
+    current content is saved as a snapshot first.
+    """
+    state = obj["state"]
+    lesson, working_path = working_file(state)
+    try:
+        entry = state.snapshots.find(working_path, snapshot)
+    except LookupError as e:
+        raise click.ClickException("{} See `tutorial history`.".format(e))
+    click.echo(
+        "Restoring {} from snapshot {} saved at {}.".format(
+            working_path, entry["digest"][:SHORT_DIGEST], entry["time"]
+        )
+    )
+    if not yes:
+        click.confirm("Do you wish to proceed?", abort=True)
+    state.snapshots.restore(
+        working_path, entry["digest"], part=lesson["part"]["id"], lesson=lesson["id"]
+    )
+    click.echo("Restored. Your previous version was saved too; see `tutorial history`.")
+
+
+@tutorial.command()
+@click.pass_obj
+def shell(obj):
+    """Run tutorial commands interactively in one process."""
+    from tutorial_runner import daemon, shell
+
+    daemon.preload()
+    click.echo("Type a command such as `status` or `lesson -l 2`; `help` lists them, `exit` quits.")
+    shell.repl(tutorial, obj)
+
+
+@tutorial.command()
+@click.pass_obj
+@click.argument("commands", type=click.File("r"), default="-")
+def batch(obj, commands):
+    """Run commands read one per line from COMMANDS (default: stdin).
+
+    Lines are either command lines such as `lesson -l 2` or JSON-RPC 2.0
+    requests such as {"jsonrpc": "2.0", "id": 1, "method": "status"}.
+    """
+    from tutorial_runner import daemon, shell
+
+    daemon.preload()
+    sys.exit(shell.batch(tutorial, obj, commands))
+
+
 @tutorial.command()
 def version():
     """Display the version of this command."""
-    click.echo("Tutorial-Runner {}".format(pkg_resources.get_distribution("tutorial-runner").version))
+    click.echo("Tutorial-Runner {}".format(__version__))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,173 @@
+"""Indexed view of a tutorial's parts and lessons."""
+
+import hashlib
+import os
+
+import click
+import pytoml
+
+from collections import namedtuple
+from pathlib import Path
+
+from tutorial_runner.jsonfile import read_json, write_json
+from tutorial_runner.profiling import PROFILER
+
+
+class Part:
+    """A part of the tutorial and its lessons in configuration order."""
+
+    __slots__ = ("id", "data", "lessons")
+
+    def __init__(self, data):
+        self.id = data["id"]
+        self.data = data
+        self.lessons = []
+
+
+class Lesson:
+    """A single lesson with links to its neighbours across the whole course."""
+
+    __slots__ = ("id", "part", "data", "prev", "next")
+
+    def __init__(self, part, data):
+        self.id = data["id"]
+        self.part = part
+        self.data = data
+        self.prev = None
+        self.next = None
+
+    @property
+    def key(self):
+        return (self.part.id, self.id)
+
+
+class Course:
+    """Lookup structure built once from the ``parts`` list of a tutorial.
+
+    Lessons are linked in the order they appear in the configuration, so
+    lesson IDs do not need to be contiguous.
+    """
+
+    def __init__(self, parts):
+        self.parts = {}
+        self.lessons = {}
+        self.first = None
+        previous = None
+        for part_data in parts or []:
+            part = Part(part_data)
+            self.parts[part.id] = part
+            for lesson_data in part_data.get("lessons", []):
+                lesson = Lesson(part, lesson_data)
+                part.lessons.append(lesson)
+                self.lessons[lesson.key] = lesson
+                if previous is None:
+                    self.first = lesson
+                else:
+                    previous.next = lesson
+                    lesson.prev = previous
+                previous = lesson
+
+    def get_part(self, part_id):
+        return self.parts.get(part_id)
+
+    def get_lesson(self, part_id, lesson_id):
+        return self.lessons.get((part_id, lesson_id))
+
+    def first_lesson(self, part_id):
+        part = self.parts.get(part_id)
+        if part is None or not part.lessons:
+            return None
+        return part.lessons[0]
+
+
+class CourseDiff(namedtuple("CourseDiff", ["added", "removed", "changed", "changed_parts"])):
+    """Differences between two versions of a course.
+
+    ``added``, ``removed`` and ``changed`` are sets of ``(part, lesson)``
+    keys; ``changed_parts`` holds the IDs of parts whose own settings or
+    lessons differ in any way.
+    """
+
+    __slots__ = ()
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.changed or self.changed_parts)
+
+
+def diff_courses(old, new):
+    """Compare two ``Course`` objects by part and lesson ID."""
+    added = set(new.lessons) - set(old.lessons)
+    removed = set(old.lessons) - set(new.lessons)
+    changed = {
+        key
+        for key in set(old.lessons) & set(new.lessons)
+        if old.lessons[key].data != new.lessons[key].data
+    }
+    changed_parts = {part_id for part_id, _ in added | removed | changed}
+    for part_id in set(old.parts) | set(new.parts):
+        old_part = old.parts.get(part_id)
+        new_part = new.parts.get(part_id)
+        if old_part is None or new_part is None or _settings(old_part) != _settings(new_part):
+            changed_parts.add(part_id)
+    return CourseDiff(added, removed, changed, changed_parts)
+
+
+def _settings(part):
+    return {key: value for key, value in part.data.items() if key != "lessons"}
+
+
+def cached_config(digest, cache_dir):
+    """Return the config data compiled from a file with ``digest``, if still cached."""
+    return read_json(Path(cache_dir) / "{}.json".format(digest))
+
+
+def load_config(config_path, cache_dir):
+    """Load the ``name`` and ``parts`` of a tutorial config through a cache.
+
+    The parsed config is stored as compact JSON under ``cache_dir`` named by
+    the SHA-256 of the source file, with a small per-path pointer recording
+    the file's mtime and size. If those still match, the TOML file is not
+    read at all; if only the mtime changed, the content hash decides whether
+    the cached copy can be reused.
+
+    Returns a ``(config_data, digest)`` tuple.
+    """
+    with PROFILER.phase("config.load"):
+        return _load_config(config_path, cache_dir)
+
+
+def _load_config(config_path, cache_dir):
+    config_path = str(Path(config_path).resolve())
+    cache_dir = Path(cache_dir)
+    pointer_path = cache_dir / "{}.path.json".format(
+        hashlib.sha1(config_path.encode("utf-8")).hexdigest()
+    )
+    pointer = read_json(pointer_path) or {}
+    try:
+        stat = os.stat(config_path)
+    except OSError as e:
+        if pointer.get("digest"):
+            cached = read_json(cache_dir / "{}.json".format(pointer["digest"]))
+            if cached is not None:
+                return cached, pointer["digest"]
+        raise click.ClickException(
+            "Tutorial config file not found: {}\nDetails: {}".format(config_path, e)
+        )
+    fingerprint = {"mtime": stat.st_mtime_ns, "size": stat.st_size}
+    if pointer.get("digest") and pointer.get("stat") == fingerprint:
+        cached = read_json(cache_dir / "{}.json".format(pointer["digest"]))
+        if cached is not None:
+            return cached, pointer["digest"]
+
+    with open(config_path, "rb") as configfile:
+        raw = configfile.read()
+    digest = hashlib.sha256(raw).hexdigest()
+    data_path = cache_dir / "{}.json".format(digest)
+    config_data = read_json(data_path)
+    if config_data is None:
+        with PROFILER.phase("config.parse"):
+            parsed = pytoml.loads(raw.decode("utf-8"))
+        config_data = {"name": parsed.get("name"), "parts": parsed.get("parts", [])}
+        write_json(data_path, config_data)
+    write_json(pointer_path, {"path": config_path, "stat": fingerprint, "digest": digest})
+    return config_data, digest
@@ -0,0 +1,183 @@
+"""A long-lived check server that keeps pytest imported between checks.
+
+``serve`` imports pytest and its plugins once, then listens on a Unix socket.
+For every request it forks a child that writes straight to the client's own
+stdout and stderr (passed over the socket) and runs pytest with
+``run_isolated`` in the client's working directory, so the check's limits
+and timeout are enforced just as they are locally. The result is sent back
+as JSON. Each check gets a fresh copy of the warm interpreter, so learner
+modules imported by one run never leak into the next.
+"""
+
+import array
+import json
+import os
+import signal
+import socket
+import sys
+
+from pathlib import Path
+
+from tutorial_runner.runner import RunResult, run_isolated
+
+SOCKET_NAME = "checkd.sock"
+_FD_SIZE = array.array("i").itemsize
+
+
+def socket_path(app_dir):
+    return str(Path(app_dir, SOCKET_NAME))
+
+
+def preload():
+    """Import pytest and any installed pytest plugins ahead of the first check."""
+    import pytest  # noqa: F401
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:  # pragma: no cover - Python < 3.8
+        return
+    try:
+        plugins = entry_points(group="pytest11")
+    except TypeError:  # pragma: no cover - Python < 3.10
+        plugins = entry_points().get("pytest11", [])
+    for plugin in plugins:
+        try:
+            plugin.load()
+        except Exception:
+            pass
+
+
+def serve(path, ready=None):
+    """Answer check requests on ``path`` until interrupted."""
+    preload()
+    if Path(path).exists():
+        if _is_running(path):
+            raise RuntimeError("A check server is already listening on {}".format(path))
+        os.unlink(path)
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen(16)
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    if ready is not None:
+        ready()
+    try:
+        while True:
+            connection, _ = server.accept()
+            try:
+                request, fds = _receive_request(connection)
+            except (OSError, ValueError):
+                connection.close()
+                continue
+            if os.fork() == 0:
+                server.close()
+                _run_child(connection, request, fds)
+            for fd in fds:
+                os.close(fd)
+            connection.close()
+    finally:
+        server.close()
+        if Path(path).exists():
+            os.unlink(path)
+
+
+def run_remote(path, args, cwd=None, limits=None):
+    """Run pytest with ``args`` on the server at ``path`` and return a ``RunResult``.
+
+    ``limits``, including the timeout, are enforced by the server as
+    ``run_isolated`` does locally. Closing the connection early kills the
+    check. Raises ``OSError`` if no server is listening.
+    """
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(path)
+        request = json.dumps(
+            {"args": list(args), "cwd": cwd or os.getcwd(), "limits": limits or {}}
+        ).encode("utf-8")
+        sys.stdout.flush()
+        sys.stderr.flush()
+        fds = array.array("i", [sys.stdout.fileno(), sys.stderr.fileno()])
+        client.sendmsg([request + b"\n"], [(socket.SOL_SOCKET, socket.SCM_RIGHTS, fds)])
+        response = _read_line(client)
+    finally:
+        client.close()
+    if not response:
+        return RunResult(1, 0.0, None, False, {})
+    result = json.loads(response.decode("utf-8"))
+    return RunResult(
+        int(result["exit"]),
+        result.get("duration", 0.0),
+        result.get("peak_memory"),
+        result.get("timed_out", False),
+        result.get("report", {}),
+    )
+
+
+def _run_child(connection, request, fds):
+    response = {"exit": 1}
+    try:
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        if len(fds) >= 2:
+            os.dup2(fds[0], 1)
+            os.dup2(fds[1], 2)
+            sys.stdout = open(1, "w", closefd=False)
+            sys.stderr = open(2, "w", closefd=False)
+        run = run_isolated(
+            request["args"],
+            cwd=request["cwd"],
+            limits=request.get("limits", {}),
+            cancel=connection.fileno(),
+        )
+        response = {
+            "exit": run.exit_code,
+            "duration": run.duration,
+            "peak_memory": run.peak_memory,
+            "timed_out": run.timed_out,
+            "report": run.report,
+        }
+    except BaseException:
+        import traceback
+        traceback.print_exc()
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            connection.sendall(json.dumps(response).encode("utf-8") + b"\n")
+        finally:
+            os._exit(response["exit"])
+
+
+def _receive_request(connection):
+    message, ancillary, _, _ = connection.recvmsg(65536, socket.CMSG_SPACE(2 * _FD_SIZE))
+    fds = array.array("i")
+    for level, kind, data in ancillary:
+        if level == socket.SOL_SOCKET and kind == socket.SCM_RIGHTS:
+            fds.frombytes(data[: len(data) - (len(data) % _FD_SIZE)])
+    while not message.endswith(b"\n"):
+        chunk = connection.recv(65536)
+        if not chunk:
+            break
+        message += chunk
+    return json.loads(message.decode("utf-8")), list(fds)
+
+
+def _read_line(client):
+    data = b""
+    while not data.endswith(b"\n"):
+        chunk = client.recv(4096)
+        if not chunk:
+            break
+        data += chunk
+    return data.strip()
+
+
+def _is_running(path):
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+        return True
+    except OSError:
+        return False
+    finally:
+        probe.close()
@@ -0,0 +1,180 @@
+"""Asynchronous export of learner progress events.
+
+``EVENTS`` does nothing until it is started with a sink (``tutorial
+--events URL`` or ``TUTORIAL_EVENTS=URL``). Events are put on a bounded
+in-memory queue and a background thread writes them to the sink in batches,
+so a slow or unreachable collector never holds up a command; when the queue
+is full new events are dropped and counted. ``close`` flushes what is left
+and is called when the command exits.
+
+Sinks are chosen by URL:
+
+* ``/path/events.jsonl`` or ``file:///path/events.jsonl`` appends JSON lines,
+* ``unix:///path/collector.sock`` sends JSON lines to a Unix socket,
+* ``http://host/path`` or ``https://...`` POSTs each batch as a JSON array.
+"""
+
+import atexit
+import json
+import queue
+import threading
+import time
+
+from datetime import datetime
+
+EVENTS_ENV_VAR = "TUTORIAL_EVENTS"
+
+_STOP = object()
+
+
+class JsonlSink:
+    """Append events to a local JSON lines file."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def write(self, batch):
+        data = "".join(json.dumps(event) + "\n" for event in batch)
+        with open(self.path, "a", encoding="utf-8") as eventfile:
+            eventfile.write(data)
+
+
+class UnixSocketSink:
+    """Send events as JSON lines to a collector listening on a Unix socket."""
+
+    def __init__(self, path, timeout=2.0):
+        self.path = path
+        self.timeout = timeout
+
+    def write(self, batch):
+        import socket
+
+        data = "".join(json.dumps(event) + "\n" for event in batch).encode("utf-8")
+        client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        client.settimeout(self.timeout)
+        try:
+            client.connect(self.path)
+            client.sendall(data)
+        finally:
+            client.close()
+
+
+class HttpSink:
+    """POST each batch of events to an HTTP endpoint as a JSON array."""
+
+    def __init__(self, url, timeout=2.0):
+        self.url = url
+        self.timeout = timeout
+
+    def write(self, batch):
+        from urllib.request import Request, urlopen
+
+        request = Request(
+            self.url,
+            data=json.dumps(batch).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        with urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+
+def sink_from_url(url):
+    from urllib.parse import urlparse
+
+    parsed = urlparse(url)
+    if parsed.scheme in ("http", "https"):
+        return HttpSink(url)
+    elif parsed.scheme == "unix":
+        return UnixSocketSink(parsed.path)
+    elif parsed.scheme == "file":
+        return JsonlSink(parsed.path)
+    elif parsed.scheme == "":
+        return JsonlSink(url)
+    raise ValueError("Unsupported event sink {!r}".format(url))
+
+
+class Emitter:
+    """Queue events in memory and write them to a sink in batches."""
+
+    def __init__(self, max_queue=1000, batch_size=100, flush_interval=0.5):
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enabled = False
+        self.context = {}
+        self.dropped = 0
+        self.failed = 0
+        self._queue = None
+        self._thread = None
+        self._sink = None
+
+    def start(self, sink, context=None):
+        """Start sending events to ``sink`` from a background thread."""
+        if self.enabled:
+            self.close()
+        self._sink = sink
+        self.context = dict(context or {})
+        self.dropped = 0
+        self.failed = 0
+        self._queue = queue.Queue(maxsize=self.max_queue)
+        self._thread = threading.Thread(target=self._run, name="tutorial-events", daemon=True)
+        self._thread.start()
+        self.enabled = True
+        atexit.register(self.close)
+
+    def emit(self, event, **fields):
+        """Queue an event without waiting; drop it if the queue is full."""
+        if not self.enabled:
+            return
+        record = {"time": datetime.now().isoformat(timespec="milliseconds"), "event": event}
+        record.update(self.context)
+        record.update(fields)
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self, timeout=5.0):
+        """Flush queued events and stop the background thread."""
+        if not self.enabled:
+            return
+        self.enabled = False
+        atexit.unregister(self.close)
+        while True:
+            try:
+                self._queue.put(_STOP, timeout=timeout)
+                break
+            except queue.Full:
+                # The sink is stuck; make room rather than hang the command.
+                try:
+                    self._queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch = []
+            item = self._queue.get()
+            deadline = time.monotonic() + self.flush_interval
+            while item is not _STOP:
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+            stopping = item is _STOP
+            if batch:
+                try:
+                    self._sink.write(batch)
+                except Exception:
+                    self.failed += len(batch)
+
+
+EVENTS = Emitter()
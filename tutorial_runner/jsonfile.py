@@ -0,0 +1,38 @@
+"""Small JSON cache files shared by the course, collection and card caches."""
+
+import json
+import os
+
+from pathlib import Path
+
+
+def read_json(path):
+    """Return the data in ``path``, or ``None`` if it is missing or unreadable."""
+    try:
+        with open(str(path), encoding="utf-8") as jsonfile:
+            return json.load(jsonfile)
+    except (OSError, ValueError):
+        return None
+
+
+def write_json(path, data):
+    """Write a cache file, quietly giving up if the cache dir is read-only.
+
+    The data goes to a temporary file that replaces ``path`` once complete,
+    so readers never see half a file. If the write fails, the temporary file
+    is removed.
+    """
+    path = Path(path)
+    temp_path = "{}.{}.tmp".format(path, os.getpid())
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(temp_path, "w", encoding="utf-8") as jsonfile:
+            json.dump(data, jsonfile, separators=(",", ":"), default=str)
+        os.replace(temp_path, str(path))
+    except OSError:
+        pass
+    finally:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
@@ -0,0 +1,78 @@
+"""Getting the next lesson ready while the learner reads about it.
+
+After a passing ``tutorial check --prewarm`` the next lesson's Python files
+are compiled into ``__pycache__`` and its tests are collected once with
+pytest. That writes pytest's assertion-rewritten bytecode for the test
+module and, for lessons selecting tests within a shared module, fills the
+collection cache, so the first check of the new lesson starts warm.
+"""
+
+import os
+import py_compile
+import sys
+
+from tutorial_runner.runner import (
+    lesson_args,
+    lesson_limits,
+    lesson_paths,
+    lesson_selection,
+    run_isolated,
+)
+
+PREWARM_TIMEOUT = 30.0
+
+
+def missing_files(lesson):
+    """Return the working, test and solution paths a lesson names but that do not exist."""
+    return [path for path in lesson_paths(lesson) if path is not None and not path.exists()]
+
+
+def prewarm(lesson, cache=None):
+    """Compile a lesson's files and collect its tests; return the pytest exit code.
+
+    Collection runs under the lesson's limits, and never for longer than
+    ``PREWARM_TIMEOUT`` seconds.
+    """
+    working_path, test_path, solution_path = lesson_paths(lesson)
+    sources = [working_path, test_path, solution_path]
+    if test_path is not None:
+        sources.append(test_path.parent / "conftest.py")
+    for path in sources:
+        if path is not None and path.suffix == ".py" and path.exists():
+            py_compile.compile(str(path), doraise=False)
+    if test_path is None or not test_path.exists():
+        return None
+    args, key = lesson_args(str(test_path), lesson_selection(lesson), cache)
+    limits = lesson_limits(lesson)
+    limits["timeout"] = min(limits.get("timeout", PREWARM_TIMEOUT), PREWARM_TIMEOUT)
+    with open(os.devnull, "w") as devnull:
+        run = run_isolated(args + ["--collect-only", "-q"], output=devnull, limits=limits)
+    if key is not None and run.exit_code == 0 and run.report.get("nodes"):
+        cache.put(key, run.report["nodes"])
+    return run.exit_code
+
+
+def in_background(lesson, cache=None):
+    """Run ``prewarm`` in a detached process and return straight away.
+
+    Without ``os.fork`` the work is done in this process instead.
+    """
+    if not hasattr(os, "fork"):
+        prewarm(lesson, cache)
+        return
+    sys.stdout.flush()
+    sys.stderr.flush()
+    pid = os.fork()
+    if pid != 0:
+        os.waitpid(pid, 0)
+        return
+    # Fork twice so the worker is not left as a zombie of this command.
+    try:
+        os.setsid()
+        if os.fork() == 0:
+            devnull = os.open(os.devnull, os.O_RDWR)
+            for fd in (0, 1, 2):
+                os.dup2(devnull, fd)
+            prewarm(lesson, cache)
+    finally:
+        os._exit(0)
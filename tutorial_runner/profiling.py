@@ -0,0 +1,103 @@
+"""Lightweight timing instrumentation for `tutorial` commands.
+
+``PROFILER`` collects per-phase wall times and counters while enabled (with
+``tutorial --profile`` or ``TUTORIAL_PROFILE=1``) and does nothing
+otherwise. At the end of a command it prints a summary table and appends a
+JSON line to ``profile.jsonl`` in the app dir.
+"""
+
+import json
+import time
+
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+
+class Profiler:
+    def __init__(self):
+        self.enabled = False
+        self.command = None
+        self.phases = OrderedDict()
+        self.counters = OrderedDict()
+        self._started = None
+        self._cprofile = None
+        self._dump_path = None
+
+    def start(self, command=None, dump_path=None):
+        """Reset all measurements and start recording."""
+        self.enabled = True
+        self.command = command
+        self.phases = OrderedDict()
+        self.counters = OrderedDict()
+        self._started = time.perf_counter()
+        self._dump_path = dump_path
+        if dump_path is not None:
+            import cProfile
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+
+    @contextmanager
+    def phase(self, name):
+        """Time the enclosed block under ``name``."""
+        if not self.enabled:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_phase(name, time.perf_counter() - started)
+
+    def add_phase(self, name, seconds):
+        if not self.enabled:
+            return
+        count, total = self.phases.get(name, (0, 0.0))
+        self.phases[name] = (count + 1, total + seconds)
+
+    def count(self, name, amount=1):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def record(self):
+        return {
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "command": self.command,
+            "total": round(time.perf_counter() - self._started, 6),
+            "phases": {
+                name: {"count": count, "seconds": round(total, 6)}
+                for name, (count, total) in self.phases.items()
+            },
+            "counters": dict(self.counters),
+        }
+
+    def summary(self, record):
+        lines = ["{:28} {:>6} {:>10}".format("phase", "calls", "ms")]
+        for name, phase in record["phases"].items():
+            lines.append(
+                "{:28} {:6d} {:10.2f}".format(name, phase["count"], phase["seconds"] * 1000)
+            )
+        lines.append("{:28} {:6} {:10.2f}".format("total", "", record["total"] * 1000))
+        for name, value in record["counters"].items():
+            lines.append("{:28} {:>17}".format(name, value))
+        return "\n".join(lines)
+
+    def finish(self, log_path=None):
+        """Stop recording, write the cProfile dump and log, and return the record."""
+        if not self.enabled:
+            return None
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            self._cprofile.dump_stats(self._dump_path)
+            self._cprofile = None
+        record = self.record()
+        self.enabled = False
+        if log_path is not None:
+            Path(log_path).parent.mkdir(parents=True, exist_ok=True)
+            with open(str(log_path), "a") as log:
+                log.write(json.dumps(record) + "\n")
+        return record
+
+
+PROFILER = Profiler()
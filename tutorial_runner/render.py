@@ -0,0 +1,123 @@
+"""Formatted output for lessons and solution files.
+
+Lesson cards are rendered for a whole part at once and cached as JSON under
+the course cache dir, keyed by the course digest, so ``tutorial lesson``
+only formats a card the first time it is shown. Solution files are streamed
+in chunks rather than read into memory.
+"""
+
+import os
+
+from pathlib import Path
+
+from tutorial_runner.jsonfile import read_json, write_json
+from tutorial_runner.runner import lesson_paths
+
+CHUNK_SIZE = 64 * 1024
+HIGHLIGHT_MAX_BYTES = 256 * 1024
+
+
+def lesson_card(lesson, base_dir):
+    """Format the lesson description shown by ``tutorial lesson``.
+
+    File paths are shown relative to ``base_dir`` where possible.
+    """
+    working_path, test_path, _ = lesson_paths(lesson)
+    return _format_card(
+        lesson, lesson["part"], _relative(working_path, base_dir), _relative(test_path, base_dir)
+    )
+
+
+def _format_card(lesson, part, working_path, test_path):
+    lines = [
+        "Currently working on Part {:02d}, Lesson {:02d} - {}".format(
+            part["id"], lesson["id"], lesson["name"]
+        ),
+        "",
+        "Working file: {}".format(working_path),
+        "   Test file: {}".format(test_path),
+    ]
+    if part.get("command"):
+        lines.append("     Command: {}".format(part["command"]))
+    if lesson.get("doc-urls"):
+        lines.append("Related docs: {}".format(lesson.get("doc-urls")))
+    if lesson.get("objectives"):
+        lines.append("\nObjectives:\n{}".format(lesson.get("objectives")))
+    return "\n".join(lines)
+
+
+def _relative(path, base_dir):
+    if path is None:
+        return "n/a"
+    try:
+        return path.relative_to(base_dir)
+    except ValueError:
+        return path
+
+
+def part_cards(part):
+    """Render the cards of every lesson in a ``course.Part``, keyed by lesson ID.
+
+    Paths are relative to the tutorial dir, so they are joined as strings
+    instead of going through ``lesson_paths``.
+    """
+    data = part.data
+    working_path = os.path.join(data["dir"], data["file"]) if data.get("file") else "n/a"
+    tests_dir = os.path.join(data["dir"], "tests") + os.sep
+    return {
+        str(lesson.id): _format_card(
+            lesson.data,
+            data,
+            working_path,
+            tests_dir + lesson.data["test"] if lesson.data.get("test") else "n/a",
+        )
+        for lesson in part.lessons
+    }
+
+
+class CardCache:
+    """Rendered lesson cards, one JSON file per part of a course version."""
+
+    def __init__(self, cache_dir, course_digest):
+        self.root = Path(cache_dir, "cards", course_digest)
+
+    def get(self, part_id, lesson_id):
+        cards = self.get_part(part_id)
+        return None if cards is None else cards.get(str(lesson_id))
+
+    def get_part(self, part_id):
+        """Return all cached cards of a part keyed by lesson ID, or ``None``."""
+        return read_json(self.root / "{}.json".format(part_id))
+
+    def put(self, part_id, cards):
+        """Store a part's cards, quietly giving up if the cache is not writable."""
+        write_json(self.root / "{}.json".format(part_id), cards)
+
+
+def iter_file(path, chunk_size=CHUNK_SIZE):
+    """Yield the text of ``path`` in chunks of about ``chunk_size`` characters."""
+    with open(str(path), encoding="utf-8", errors="replace") as source:
+        for chunk in iter(lambda: source.read(chunk_size), ""):
+            yield chunk
+
+
+def highlighted(path, chunks):
+    """Syntax-highlight ``chunks`` of ``path`` with pygments, if it is installed.
+
+    Highlighting needs the whole file, so files over ``HIGHLIGHT_MAX_BYTES``
+    are passed through as they are.
+    """
+    try:
+        from pygments import highlight
+        from pygments.formatters import TerminalFormatter
+        from pygments.lexers import get_lexer_for_filename
+        from pygments.util import ClassNotFound
+    except ImportError:
+        return chunks
+    if os.path.getsize(str(path)) > HIGHLIGHT_MAX_BYTES:
+        return chunks
+    try:
+        lexer = get_lexer_for_filename(str(path))
+    except ClassNotFound:
+        return chunks
+    return iter([highlight("".join(chunks), lexer, TerminalFormatter())])
@@ -0,0 +1,445 @@
+"""Running lesson tests with pytest."""
+
+import hashlib
+import json
+import os
+import select
+import signal
+import sys
+import time
+
+from collections import namedtuple
+from pathlib import Path
+
+from tutorial_runner.jsonfile import read_json, write_json
+from tutorial_runner.profiling import PROFILER
+
+
+def lesson_paths(lesson):
+    """Return the working, test and solution file paths for a lesson.
+
+    ``lesson`` is a dict as returned by ``State.get_current_lesson``. Paths
+    the lesson does not define are ``None``.
+    """
+    part_dir = Path(lesson["tutorial_dir"], lesson["part"]["dir"])
+    working_path = None
+    test_path = None
+    solution_path = None
+    if lesson["part"].get("file"):
+        working_path = part_dir / lesson["part"]["file"]
+    if lesson.get("test"):
+        test_path = part_dir / "tests" / lesson["test"]
+    if lesson.get("solution"):
+        solution_path = part_dir / "solutions" / lesson["solution"]
+    return working_path, test_path, solution_path
+
+
+def lesson_digest(lesson):
+    """Hash everything a lesson's check depends on.
+
+    That is the working, test and solution files, the ``conftest.py`` next
+    to the tests, and the lesson's and part's configuration, so editing any
+    of them invalidates cached results.
+    """
+    digest = hashlib.sha256()
+    config = {key: value for key, value in lesson.items() if key not in ("part", "tutorial_dir")}
+    part = {key: value for key, value in lesson["part"].items() if key != "lessons"}
+    digest.update(json.dumps([config, part], sort_keys=True, default=str).encode("utf-8"))
+    paths = list(lesson_paths(lesson))
+    if paths[1] is not None:
+        paths.append(paths[1].parent / "conftest.py")
+    for path in paths:
+        digest.update(b"\0")
+        if path is None:
+            continue
+        try:
+            with open(str(path), "rb") as source:
+                for chunk in iter(lambda: source.read(65536), b""):
+                    digest.update(chunk)
+        except OSError:
+            digest.update(b"missing")
+    return digest.hexdigest()
+
+
+SELECTION_KEYS = ("tests", "marker", "keyword")
+
+
+def lesson_selection(lesson):
+    """Return the tests a lesson selects within its test module.
+
+    A lesson may name ``tests`` (node IDs inside the module such as
+    ``test_hello`` or ``TestGreeting::test_bye``), a ``marker`` expression
+    for ``-m`` and a ``keyword`` expression for ``-k``. Lessons without any
+    of them run the whole module.
+    """
+    return {key: lesson[key] for key in SELECTION_KEYS if lesson.get(key)}
+
+
+def pytest_args(lesson_test_file, selection=None, nodes=None):
+    """Build the pytest command line used to check a lesson.
+
+    ``nodes`` are node IDs within the test module from the collection cache,
+    such as ``TestGreeting::test_bye``. They replace the ``selection``.
+    """
+    try:
+        import pytest_clarity  # noqa: F401
+        extra_args = ['--diff-type=unified', '--no-hints']
+    except ImportError:
+        extra_args = []
+    extra_args += ["--disable-pytest-warnings", "-vx"]
+    if nodes:
+        return extra_args + ["{}::{}".format(lesson_test_file, node) for node in nodes]
+    selection = selection or {}
+    if selection.get("tests"):
+        targets = ["{}::{}".format(lesson_test_file, test) for test in selection["tests"]]
+    else:
+        targets = ["{0}".format(lesson_test_file)]
+    if selection.get("marker"):
+        extra_args += ["-m", selection["marker"]]
+    if selection.get("keyword"):
+        extra_args += ["-k", selection["keyword"]]
+    return extra_args + targets
+
+
+class CollectionCache:
+    """Node IDs that a lesson's selection resolved to, keyed on the test module.
+
+    The key covers the module's content, a ``conftest.py`` next to it and the
+    selection itself, so editing any of them collects the module afresh. Only
+    the part of each node ID after the module path is stored, so identical
+    modules in different directories can share an entry safely.
+    """
+
+    FORMAT = b"node-suffixes"
+
+    def __init__(self, cache_dir):
+        self.cache_dir = Path(cache_dir)
+
+    def key(self, lesson_test_file, selection):
+        digest = hashlib.sha256(self.FORMAT)
+        digest.update(json.dumps(selection, sort_keys=True).encode("utf-8"))
+        test_path = Path(lesson_test_file)
+        for path in (test_path, test_path.parent / "conftest.py"):
+            digest.update(b"\0")
+            try:
+                digest.update(path.read_bytes())
+            except OSError:
+                digest.update(b"missing")
+        return digest.hexdigest()
+
+    def get(self, key):
+        return read_json(self.cache_dir / "{}.json".format(key))
+
+    def put(self, key, nodes):
+        """Store collected ``nodes``, quietly giving up if the cache dir is not writable."""
+        write_json(
+            self.cache_dir / "{}.json".format(key),
+            [node.split("::", 1)[1] for node in nodes if "::" in node],
+        )
+
+
+def lesson_args(lesson_test_file, selection=None, cache=None):
+    """Return ``(args, key)`` for checking a lesson.
+
+    With a ``selection`` and a ``cache`` hit, pytest is pointed straight at
+    the cached node IDs. ``key`` is set when the nodes collected by this run
+    should be stored with ``cache.put``.
+    """
+    if not selection or cache is None:
+        return pytest_args(lesson_test_file, selection), None
+    key = cache.key(lesson_test_file, selection)
+    nodes = cache.get(key)
+    if nodes:
+        PROFILER.count("pytest.collection_cache_hits")
+        return pytest_args(lesson_test_file, nodes=nodes), None
+    return pytest_args(lesson_test_file, selection), key
+
+
+def run_pytest(args, plugins=None):
+    """Run pytest in this process and return its exit code."""
+    import pytest
+    return int(pytest.main(list(args), plugins=plugins))
+
+
+class SessionTimer:
+    """pytest plugin timing collection and the test run."""
+
+    def __init__(self):
+        self.timings = {}
+        self._collection_started = None
+        self._collection_finished = None
+
+    def pytest_collection(self, session):
+        self._collection_started = time.perf_counter()
+
+    def pytest_collection_finish(self, session):
+        self._collection_finished = time.perf_counter()
+        self.timings["pytest.collect"] = self._collection_finished - self._collection_started
+
+    def pytest_sessionfinish(self, session, exitstatus):
+        if self._collection_finished is not None:
+            self.timings["pytest.run"] = time.perf_counter() - self._collection_finished
+
+
+class NodeRecorder:
+    """pytest plugin recording the node IDs left after selection."""
+
+    def __init__(self):
+        self.nodes = []
+
+    def pytest_collection_finish(self, session):
+        for item in session.items:
+            # ``item.path`` only exists from pytest 7 on; older ones have ``fspath``.
+            path = str(getattr(item, "path", None) or item.fspath)
+            if "::" in item.nodeid:
+                path += "::" + item.nodeid.split("::", 1)[1]
+            self.nodes.append(path)
+
+
+class ResultCollector:
+    """pytest plugin recording each test's outcome, duration and failure message."""
+
+    def __init__(self):
+        self.tests = {}
+
+    def pytest_runtest_logreport(self, report):
+        test = self.tests.setdefault(
+            report.nodeid, {"name": report.nodeid, "outcome": "passed", "duration": 0.0}
+        )
+        test["duration"] += report.duration
+        if report.failed:
+            test["outcome"] = "failed" if report.when == "call" else "error"
+            test["message"] = _failure_message(report)
+        elif report.skipped and test["outcome"] == "passed":
+            test["outcome"] = "skipped"
+
+    def results(self):
+        return list(self.tests.values())
+
+
+def _failure_message(report):
+    crash = getattr(report.longrepr, "reprcrash", None)
+    if crash is not None:
+        return crash.message
+    lines = report.longreprtext.strip().splitlines()
+    return lines[-1] if lines else ""
+
+
+def summarize_tests(tests, slowest=3, message_length=200):
+    """Reduce ``ResultCollector`` results to a compact summary for the state.
+
+    The summary counts outcomes, totals the durations and keeps the
+    ``slowest`` tests and the failures with shortened messages.
+    """
+    summary = {"passed": 0, "failed": 0, "skipped": 0, "error": 0}
+    for test in tests:
+        summary[test["outcome"]] += 1
+    summary["duration"] = round(sum(test["duration"] for test in tests), 3)
+    summary["slowest"] = [
+        {"name": test["name"], "duration": round(test["duration"], 3)}
+        for test in sorted(tests, key=lambda test: test["duration"], reverse=True)[:slowest]
+    ]
+    summary["failures"] = [
+        {"name": test["name"], "message": test.get("message", "")[:message_length]}
+        for test in tests
+        if test["outcome"] in ("failed", "error")
+    ]
+    return summary
+
+
+class RunResult(
+    namedtuple("RunResult", ["exit_code", "duration", "peak_memory", "timed_out", "report"])
+):
+    """Exit code, wall time in seconds and peak RSS in MB of a pytest child.
+
+    ``report`` holds whatever the child's plugins reported back, such as
+    ``timings`` for collection and the test run, the collected ``nodes`` and
+    the outcome of each test in ``tests``.
+    """
+
+    __slots__ = ()
+
+
+LIMIT_KEYS = ("timeout", "cpu-time", "memory", "open-files")
+
+
+def lesson_limits(lesson):
+    """Collect resource limits for a lesson; lesson settings override the part's.
+
+    ``timeout`` and ``cpu-time`` are in seconds, ``memory`` is the address
+    space limit in MB and ``open-files`` caps file descriptors.
+    """
+    limits = {}
+    for source in (lesson.get("part", {}), lesson):
+        for key in LIMIT_KEYS:
+            if source.get(key) is not None:
+                limits[key] = source[key]
+    return limits
+
+
+def apply_limits(limits):
+    """Lower this process's rlimits according to ``limits`` where supported."""
+    try:
+        import resource
+    except ImportError:  # pragma: no cover - not available on Windows
+        return
+    settings = []
+    if limits.get("cpu-time"):
+        settings.append((resource.RLIMIT_CPU, int(limits["cpu-time"])))
+    if limits.get("memory"):
+        settings.append((resource.RLIMIT_AS, int(limits["memory"]) * 1024 * 1024))
+    if limits.get("open-files"):
+        settings.append((resource.RLIMIT_NOFILE, int(limits["open-files"])))
+    for kind, value in settings:
+        _, hard = resource.getrlimit(kind)
+        if hard != resource.RLIM_INFINITY:
+            value = min(value, hard)
+        try:
+            resource.setrlimit(kind, (value, hard))
+        except (ValueError, OSError):
+            pass
+
+
+def run_isolated(args, cwd=None, output=None, limits=None, cancel=None):
+    """Run pytest in a child process and return a ``RunResult``.
+
+    The child is forked from this process where possible, so an already
+    imported pytest is reused while modules imported by the tests are
+    discarded with the child. If ``output`` is an open file, the child's
+    stdout and stderr go there instead of to the terminal.
+
+    ``limits`` (see ``lesson_limits``) are applied to the child with
+    ``setrlimit``. A child still running after ``timeout`` seconds is killed
+    together with any processes it started. So is a child still running when
+    the file descriptor ``cancel`` becomes readable, such as a socket whose
+    peer hung up.
+    """
+    limits = limits or {}
+    timeout = limits.get("timeout")
+    started = time.perf_counter()
+    if not hasattr(os, "fork"):
+        return _run_subprocess(args, cwd, output, timeout, started)
+    sys.stdout.flush()
+    sys.stderr.flush()
+    ready, done = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        code = 1
+        try:
+            os.close(ready)
+            os.setpgid(0, 0)
+            if cwd is not None:
+                os.chdir(cwd)
+            if output is not None:
+                os.dup2(output.fileno(), 1)
+                os.dup2(output.fileno(), 2)
+            # sys.stdout may not be fd 1, e.g. under click's CliRunner or while
+            # `tutorial batch` captures a command's output; anything written
+            # to such a buffer would vanish with this process.
+            sys.stdout = open(1, "w", closefd=False)
+            sys.stderr = open(2, "w", closefd=False)
+            apply_limits(limits)
+            timer = SessionTimer()
+            recorder = NodeRecorder()
+            collector = ResultCollector()
+            code = run_pytest(args, plugins=[timer, recorder, collector])
+            _write_report(
+                done,
+                {"timings": timer.timings, "nodes": recorder.nodes, "tests": collector.results()},
+            )
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(code)
+    os.close(done)
+    try:
+        os.setpgid(pid, pid)
+    except OSError:
+        pass
+    timed_out = cancelled = False
+    try:
+        report, timed_out, cancelled = _read_report(ready, timeout, cancel)
+        if timed_out or cancelled:
+            _kill_group(pid)
+        _, status, usage = os.wait4(pid, 0)
+    except BaseException:
+        _kill_group(pid)
+        os.wait4(pid, 0)
+        raise
+    finally:
+        os.close(ready)
+    if os.WIFEXITED(status) and not (timed_out or cancelled):
+        exit_code = os.WEXITSTATUS(status)
+    else:
+        exit_code = 1
+    duration = time.perf_counter() - started
+    PROFILER.add_phase("pytest.process", duration)
+    for name, seconds in report.get("timings", {}).items():
+        PROFILER.add_phase(name, seconds)
+    return RunResult(exit_code, duration, _max_rss_mb(usage), timed_out, report)
+
+
+def _write_report(fd, report):
+    data = json.dumps(report).encode("utf-8")
+    while data:
+        data = data[os.write(fd, data):]
+
+
+def _read_report(fd, timeout, cancel=None):
+    """Read the child's report until EOF, which comes when the child exits.
+
+    Returns ``(report, timed_out, cancelled)``. Waiting on the pipe means no
+    polling.
+    """
+    deadline = None if timeout is None else time.perf_counter() + timeout
+    watched = [fd] if cancel is None else [fd, cancel]
+    chunks = []
+    while True:
+        remaining = None if deadline is None else max(deadline - time.perf_counter(), 0)
+        readable, _, _ = select.select(watched, [], [], remaining)
+        if not readable:
+            return {}, True, False
+        if fd not in readable:
+            return {}, False, True
+        chunk = os.read(fd, 65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    try:
+        return json.loads(b"".join(chunks).decode("utf-8")), False, False
+    except ValueError:
+        return {}, False, False
+
+
+def _run_subprocess(args, cwd, output, timeout, started):
+    import subprocess
+
+    process = subprocess.Popen(
+        [sys.executable, "-m", "pytest"] + list(args),
+        cwd=cwd,
+        stdout=output,
+        stderr=subprocess.STDOUT if output is not None else None,
+    )
+    try:
+        exit_code = process.wait(timeout=timeout)
+        timed_out = False
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+        exit_code = 1
+        timed_out = True
+    return RunResult(exit_code, time.perf_counter() - started, None, timed_out, {})
+
+
+def _kill_group(pid):
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except OSError:
+        pass
+
+
+def _max_rss_mb(usage):
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+    if sys.platform == "darwin":
+        return usage.ru_maxrss / (1024.0 * 1024.0)
+    return usage.ru_maxrss / 1024.0
@@ -0,0 +1,165 @@
+"""Run many `tutorial` commands in one process.
+
+``tutorial shell`` reads commands interactively and ``tutorial batch`` reads
+them from stdin, one per line, either as a command line (``lesson -l 3``)
+or as a JSON-RPC 2.0 request::
+
+    {"jsonrpc": "2.0", "id": 1, "method": "status", "params": ["--format", "json"]}
+
+``method`` is the command name (``"classroom progress"`` for subcommands)
+and ``params`` its arguments, as a list or as ``{"args": [...]}``. The
+result holds the command's ``exit_code`` and its ``output``.
+
+Every command runs through the same click group with the same ``obj``, so
+the ``State`` is read once and kept, and pending changes are flushed after
+each command. pytest and its plugins are imported once at startup, so the
+checks forked from this process start warm.
+"""
+
+import io
+import json
+import os
+import shlex
+import sys
+
+from contextlib import contextmanager, redirect_stderr, redirect_stdout
+
+import click
+
+PROMPT = "tutorial> "
+NESTED_COMMANDS = ("shell", "batch")
+
+
+def run_command(group, args, obj):
+    """Invoke ``group`` with ``args`` and return the exit code."""
+    if args and args[0] in NESTED_COMMANDS:
+        click.echo("`{}` cannot be used here.".format(args[0]), err=True)
+        return 2
+    try:
+        result = group.main(args, prog_name="tutorial", obj=obj, standalone_mode=False)
+        code = result if isinstance(result, int) else 0
+    except click.exceptions.Exit as e:
+        code = e.exit_code
+    except click.ClickException as e:
+        e.show()
+        code = e.exit_code
+    except click.Abort:
+        click.echo("Aborted!", err=True)
+        code = 1
+    except SystemExit as e:
+        code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    finally:
+        obj["state"].flush()
+    return code
+
+
+def repl(group, obj):
+    """Read and run commands until end of input or ``exit``."""
+    try:
+        import readline  # noqa: F401 - line editing and history for input()
+    except ImportError:  # pragma: no cover - not available on Windows
+        pass
+    while True:
+        try:
+            line = input(PROMPT)
+        except EOFError:
+            click.echo()
+            return
+        except KeyboardInterrupt:
+            click.echo()
+            continue
+        try:
+            args = shlex.split(line)
+        except ValueError as e:
+            click.echo("Error: {}".format(e), err=True)
+            continue
+        if not args:
+            continue
+        if args[0] in ("exit", "quit"):
+            return
+        if args[0] == "help":
+            args = ["--help"]
+        try:
+            run_command(group, args, obj)
+        except KeyboardInterrupt:
+            click.echo()
+
+
+def batch(group, obj, lines, output=None):
+    """Run a command for each line and return 1 if any of them failed.
+
+    Command-line requests write their output as usual. For JSON-RPC
+    requests the output and error messages are captured and returned in the
+    response, and
+    anything written straight to the stdout file descriptor, such as the
+    output of pytest children, goes to stderr so responses stay parseable.
+    """
+    output = output or sys.stdout
+    failed = False
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith("{"):
+            response = _rpc(group, obj, line)
+            failed = failed or "error" in response or response["result"]["exit_code"] != 0
+            output.write(json.dumps(response) + "\n")
+            output.flush()
+            continue
+        try:
+            args = shlex.split(line)
+        except ValueError as e:
+            click.echo("Error: {}".format(e), err=True)
+            failed = True
+            continue
+        failed = run_command(group, args, obj) != 0 or failed
+    return 1 if failed else 0
+
+
+@contextmanager
+def _stdout_fd_to_stderr():
+    try:
+        stdout_fd = sys.__stdout__.fileno()
+        stderr_fd = sys.__stderr__.fileno()
+    except (AttributeError, OSError, ValueError, io.UnsupportedOperation):
+        yield
+        return
+    sys.__stdout__.flush()
+    saved = os.dup(stdout_fd)
+    os.dup2(stderr_fd, stdout_fd)
+    try:
+        yield
+    finally:
+        sys.__stdout__.flush()
+        os.dup2(saved, stdout_fd)
+        os.close(saved)
+
+
+def _rpc(group, obj, line):
+    try:
+        request = json.loads(line)
+    except ValueError as e:
+        return _error(None, -32700, "Parse error: {}".format(e))
+    request_id = request.get("id") if isinstance(request, dict) else None
+    if not isinstance(request, dict) or not isinstance(request.get("method"), str):
+        return _error(request_id, -32600, "Invalid request")
+    params = request.get("params", [])
+    if isinstance(params, dict):
+        params = params.get("args", [])
+    if not isinstance(params, list):
+        return _error(request_id, -32602, "Invalid params")
+    method = request["method"].split()
+    if not method or method[0] not in group.commands or method[0] in NESTED_COMMANDS:
+        return _error(request_id, -32601, "Method not found: {}".format(request["method"]))
+    captured = io.StringIO()
+    with _stdout_fd_to_stderr(), redirect_stdout(captured), redirect_stderr(captured):
+        code = run_command(group, method + [str(param) for param in params], obj)
+    return {
+        "jsonrpc": "2.0",
+        "id": request_id,
+        "result": {"exit_code": code, "output": captured.getvalue()},
+    }
+
+
+def _error(request_id, code, message):
+    return {"jsonrpc": "2.0", "id": request_id, "error": {"code": code, "message": message}}
@@ -0,0 +1,100 @@
+"""Content-addressed snapshots of learners' working files.
+
+Every version of a file is stored once, zlib-compressed, under
+``objects/<first two hex digits>/<rest of the SHA-256>``. A JSON lines index
+per working file records when each version was saved and why, so saving an
+unchanged file again costs one hash and nothing else.
+"""
+
+import hashlib
+import json
+import os
+import zlib
+
+from datetime import datetime
+from pathlib import Path
+
+
+class SnapshotStore:
+    def __init__(self, root):
+        self.root = Path(root)
+
+    def object_path(self, digest):
+        return self.root / "objects" / digest[:2] / digest[2:]
+
+    def index_path(self, path):
+        name = hashlib.sha1(str(Path(path).resolve()).encode("utf-8")).hexdigest()
+        return self.root / "index" / "{}.jsonl".format(name)
+
+    def save(self, path, reason, **fields):
+        """Snapshot the file at ``path`` and return the entry describing it.
+
+        If the newest snapshot of ``path`` already has the same content, that
+        entry is returned and nothing is written.
+        """
+        with open(str(path), "rb") as source:
+            data = source.read()
+        digest = hashlib.sha256(data).hexdigest()
+        history = self.history(path)
+        if history and history[-1]["digest"] == digest:
+            return history[-1]
+        object_path = self.object_path(digest)
+        if not object_path.exists():
+            _write_atomic(object_path, zlib.compress(data))
+        entry = {
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "digest": digest,
+            "size": len(data),
+            "reason": reason,
+        }
+        entry.update(fields)
+        index_path = self.index_path(path)
+        index_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(str(index_path), "a", encoding="utf-8") as index:
+            index.write(json.dumps(entry) + "\n")
+        return entry
+
+    def history(self, path):
+        """Return the snapshots of ``path``, oldest first."""
+        try:
+            with open(str(self.index_path(path)), encoding="utf-8") as index:
+                return [json.loads(line) for line in index if line.strip()]
+        except FileNotFoundError:
+            return []
+
+    def find(self, path, ref):
+        """Return the entry for ``ref``: a number from ``history`` or a digest prefix.
+
+        Raises ``LookupError`` if nothing or more than one version matches.
+        """
+        history = self.history(path)
+        if ref.isdigit() and len(ref) < 4:
+            number = int(ref)
+            if not 1 <= number <= len(history):
+                raise LookupError("There is no snapshot number {}.".format(ref))
+            return history[number - 1]
+        matches = {entry["digest"]: entry for entry in history if entry["digest"].startswith(ref)}
+        if len(matches) != 1:
+            raise LookupError(
+                "{} snapshots match {!r}.".format("No" if not matches else "Several", ref)
+            )
+        return matches.popitem()[1]
+
+    def read(self, digest):
+        with open(str(self.object_path(digest)), "rb") as stored:
+            return zlib.decompress(stored.read())
+
+    def restore(self, path, digest, **fields):
+        """Replace ``path`` with a stored version, snapshotting its current content first."""
+        data = self.read(digest)
+        if Path(path).exists():
+            self.save(path, "restore", **fields)
+        _write_atomic(Path(path), data)
+
+
+def _write_atomic(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = "{}.{}.tmp".format(path, os.getpid())
+    with open(temp_path, "wb") as target:
+        target.write(data)
+    os.replace(temp_path, str(path))
@@ -1,25 +1,155 @@
 import click
-import pytoml
+import os
 
-from codecs import open
+from contextlib import contextmanager
+from datetime import datetime
 from pathlib import Path
 
+from tutorial_runner import classroom
+from tutorial_runner.backends import SqliteBackend, TomlBackend
+from tutorial_runner.course import Course, cached_config, diff_courses, load_config
+from tutorial_runner.events import EVENTS
+from tutorial_runner.profiling import PROFILER
+from tutorial_runner.render import CardCache, lesson_card, part_cards
+from tutorial_runner.snapshots import SnapshotStore
+
 APP_NAME = "Tutorial Runner"
+BACKEND_ENV_VAR = "TUTORIAL_STATE_BACKEND"
 
 
 class State:
-    def __init__(self):
+    """Tutorial state stored in the user's app dir.
+
+    The state is read from its backend at most once and kept in memory.
+    Outside of a session every ``save`` is written straight through; inside a
+    session changes accumulate in memory and are written once by ``flush``.
+
+    The backend defaults to a TOML file; set ``TUTORIAL_STATE_BACKEND=sqlite``
+    to keep state in an SQLite database instead. An existing TOML state file
+    is migrated into the database the first time it is read. In classroom
+    mode (``TUTORIAL_CLASSROOM``) the state lives in the shared classroom
+    database under the learner's ID.
+    """
+
+    def __init__(self, backend=None):
         self.app_dir = click.get_app_dir(APP_NAME)
         self.state_file_path = str(Path(self.app_dir, "tutorial-state.toml"))
+        self.course_cache_dir = str(Path(self.app_dir, "courses"))
+        if classroom.classroom_path() is not None:
+            self.course_cache_dir = classroom.course_cache_dir(classroom.classroom_path())
+        if backend is None:
+            backend = self.default_backend()
+        self.backend = backend
+        self._state = None
+        self._course = None
+        self._config = None
+        self._config_digest = None
+        self._changed = set()
+        self._dirty = False
+        self._session_depth = 0
 
-    def save(self, new_state):
-        with open(self.state_file_path, mode="w", encoding="utf-8") as statefile:
-            pytoml.dump(new_state, statefile)
+    def default_backend(self):
+        if classroom.classroom_path() is not None:
+            return SqliteBackend(classroom.classroom_path(), learner=classroom.learner_id())
+        backend_name = os.environ.get(BACKEND_ENV_VAR, "toml")
+        if backend_name == "toml":
+            return TomlBackend(self.state_file_path)
+        elif backend_name == "sqlite":
+            return SqliteBackend(
+                Path(self.app_dir, "tutorial-state.db"), migrate_from=self.state_file_path
+            )
+        raise click.ClickException(
+            "Unknown state backend {!r} in {}. Use `toml` or `sqlite`.".format(
+                backend_name, BACKEND_ENV_VAR
+            )
+        )
+
+    @contextmanager
+    def session(self):
+        """Defer writes until the outermost session exits."""
+        self.begin_session()
+        try:
+            yield self
+        finally:
+            self.end_session()
+
+    def begin_session(self):
+        self._session_depth += 1
+
+    def end_session(self):
+        self._session_depth -= 1
+        if self._session_depth == 0:
+            self.flush()
+
+    def flush(self):
+        """Write pending changes to the backend, if there are any."""
+        if not self._dirty:
+            return
+        with PROFILER.phase("state.save"):
+            with self.backend.lock():
+                self.backend.write(self._state, self._changed)
+        self._changed = set()
+        self._dirty = False
+
+    def save(self, new_state, changed=None):
+        """Store ``new_state``, optionally naming the paths that changed.
+
+        Without ``changed`` the whole state is rewritten on the next flush.
+        """
+        if new_state is not self._state:
+            self._course = None
+            self._config = None
+            self._config_digest = None
+        self._state = new_state
+        if changed is None:
+            self._changed = None
+        elif self._changed is not None:
+            self._changed.update(changed)
+        self._dirty = True
+        if self._session_depth == 0:
+            self.flush()
 
     def load(self):
+        if self._state is None:
+            self._state = self.read()
+        return self._state
+
+    @property
+    def snapshots(self):
+        """Store for snapshots of working files, under the app dir."""
+        return SnapshotStore(Path(self.app_dir, "snapshots"))
+
+    @property
+    def course(self):
+        """Index of the tutorial's parts and lessons, built on first use."""
+        if self._course is None:
+            self._course = Course(self.load_config()["parts"])
+        return self._course
+
+    def load_config(self):
+        """Return the tutorial config data for the initialized tutorial.
+
+        State files written by older versions carry a full copy of ``parts``;
+        newer ones only point at the config file, which is read through the
+        compiled course cache. The digest of the file as loaded is kept in
+        ``_config_digest``; it differs from ``course_digest`` in the state
+        once the config is edited and not yet synced.
+        """
+        if self._config is None:
+            state = self.load()
+            if "parts" in state:
+                self._config = {"name": state.get("name"), "parts": state["parts"]}
+                self._config_digest = None
+            else:
+                self._config, self._config_digest = load_config(
+                    state["config"], self.course_cache_dir
+                )
+        return self._config
+
+    def read(self):
         try:
-            with open(self.state_file_path, mode="r", encoding="utf-8") as statefile:
-                return pytoml.load(statefile)
+            with PROFILER.phase("state.load"):
+                return self.backend.read()
         except FileNotFoundError as e:
             raise click.ClickException(
                 "Tutorial status file not found. You probably need to run `tutorial init`. \nDetails: {}".format(
@@ -28,19 +158,142 @@ class State:
             )
 
     def initialize(self, config_filename):
-        with open(config_filename) as configfile:
-            config_data = pytoml.load(configfile)
-        tutorial_dir = str(Path(config_filename).resolve().parent)
+        config_path = Path(config_filename).resolve()
         if not Path(self.app_dir).exists():
             Path(self.app_dir).mkdir(parents=True, exist_ok=True)
+        config_data, digest = load_config(config_path, self.course_cache_dir)
+        course = Course(config_data["parts"])
+        first = course.first
+        part_id, lesson_id = first.key if first is not None else (1, 1)
         default_state = {
             "name": config_data.get("name"),
-            "parts": config_data.get("parts"),
-            "tutorial_dir": tutorial_dir,
-            "current": {"part": 1, "lesson": 1},
-            "progress": {"1.1": "in-progress"},
+            "config": str(config_path),
+            "course_digest": digest,
+            "tutorial_dir": str(config_path.parent),
+            "current": {"part": part_id, "lesson": lesson_id},
+            "progress": {"{}.{}".format(part_id, lesson_id): "in-progress"},
         }
         self.save(default_state)
+        self._course = course
+        self._config = config_data
+        self._config_digest = digest
+        self.build_lesson_cards()
+
+    def sync(self, config_filename=None):
+        """Bring the state up to date with an edited tutorial config.
+
+        The new config is compared with the version the state was last
+        initialized or synced with, by part and lesson ID. Progress is kept
+        for lessons that still exist, lessons that were removed are dropped,
+        and cached check results and lesson cards are only renewed for parts
+        that changed. If the current lesson was removed, the lesson following
+        the nearest earlier one that remains becomes current. Returns the
+        ``CourseDiff``.
+
+        The ``Course`` index itself is always rebuilt from the new config:
+        lessons are linked across part boundaries, and building it is a
+        single pass over the parts, far cheaper than rendering their cards.
+        """
+        state = self.load()
+        previous_digest = state.get("course_digest")
+        config_path = Path(config_filename or state["config"]).resolve()
+        config_data, digest = load_config(config_path, self.course_cache_dir)
+        new = Course(config_data["parts"])
+        if "parts" in state:
+            old_data = {"parts": state["parts"]}
+        else:
+            old_data = cached_config(state.get("course_digest", ""), self.course_cache_dir)
+        if old_data is not None:
+            old = Course(old_data["parts"])
+            diff = diff_courses(old, new)
+        else:
+            # The old version is gone from the cache, so assume every part changed.
+            old = Course([])
+            diff = diff_courses(old, new)
+            diff = diff._replace(added=set(), changed_parts=set(new.parts))
+
+        changed = [("name",), ("config",), ("course_digest",), ("tutorial_dir",), ("parts",)]
+        state.pop("parts", None)
+        state["name"] = config_data.get("name")
+        state["config"] = str(config_path)
+        state["course_digest"] = digest
+        state["tutorial_dir"] = str(config_path.parent)
+        for section in ("progress", "results"):
+            entries = state.get(section, {})
+            for key in list(entries):
+                part_id, lesson_id = (int(value) for value in key.split("."))
+                if (part_id, lesson_id) not in new.lessons or (
+                    section == "results" and part_id in diff.changed_parts
+                ):
+                    del entries[key]
+                    changed.append((section, key))
+
+        current = state.get("current", {})
+        lesson = old.get_lesson(current.get("part"), current.get("lesson"))
+        if new.get_lesson(current.get("part"), current.get("lesson")) is None:
+            # Carry on after the nearest earlier lesson that is still there,
+            # so a renumbered or replaced lesson is picked up in its place.
+            lesson = lesson.prev if lesson is not None else None
+            while lesson is not None and lesson.key not in new.lessons:
+                lesson = lesson.prev
+            if lesson is None:
+                lesson = new.first
+            else:
+                lesson = new.lessons[lesson.key].next or new.lessons[lesson.key]
+            if lesson is not None:
+                progress_key = "{}.{}".format(*lesson.key)
+                state["current"] = {"part": lesson.part.id, "lesson": lesson.id}
+                state.setdefault("progress", {}).setdefault(progress_key, "in-progress")
+                changed += [("current",), ("progress", progress_key)]
+        self.save(state, changed=changed)
+        self._course = new
+        self._config = config_data
+        self._config_digest = digest
+        self.build_lesson_cards(previous_digest, diff.changed_parts)
+        return diff
+
+    def build_lesson_cards(self, previous_digest=None, changed_parts=()):
+        """Render the card of every lesson into the course cache.
+
+        Parts not in ``changed_parts`` reuse the cards already rendered for
+        the course version ``previous_digest``, if there are any.
+        """
+        digest = self._config_digest
+        cache = CardCache(self.course_cache_dir, digest)
+        previous = None
+        if previous_digest is not None:
+            previous = CardCache(self.course_cache_dir, previous_digest)
+        for part in self.course.parts.values():
+            cards = None
+            if previous is not None and part.id not in changed_parts:
+                cards = previous.get_part(part.id)
+                if cards is not None and previous_digest == digest:
+                    continue
+            cache.put(part.id, cards if cards is not None else part_cards(part))
+
+    def get_lesson_card(self, part_id, lesson_id, base_dir):
+        """Return the formatted card of a lesson with paths relative to ``base_dir``.
+
+        Cards in the cache are relative to the tutorial dir, so they are only
+        used when ``base_dir`` is the tutorial dir. They are keyed on the
+        digest of the config the course was loaded from, so an edited config
+        never shows cards rendered for an older version.
+        """
+        state = self.load()
+        self.load_config()
+        lesson = self.course.get_lesson(part_id, lesson_id)
+        tutorial_dir = state["tutorial_dir"]
+        if self._config_digest is None or Path(base_dir) != Path(tutorial_dir):
+            return lesson_card(
+                dict(lesson.data, part=lesson.part.data, tutorial_dir=tutorial_dir), Path(base_dir)
+            )
+        cache = CardCache(self.course_cache_dir, self._config_digest)
+        card = cache.get(part_id, lesson_id)
+        if card is None:
+            cards = part_cards(lesson.part)
+            cache.put(part_id, cards)
+            card = cards[str(lesson_id)]
+        return card
 
     def is_initialized(self):
         try:
@@ -49,7 +302,7 @@ class State:
             return False
         except:
             raise
-        if "parts" in state:
+        if "parts" in state or "config" in state:
             return True
         else:
             return False
@@ -63,20 +316,100 @@ class State:
         progress_key = "{}.{}".format(part_id, lesson_id)
         state = self.load()
         state["progress"][progress_key] = status
-        self.save(state)
+        self.save(state, changed=[("progress", progress_key)])
+        EVENTS.emit(
+            "lesson_completed" if status == "complete" else "lesson_status",
+            part=part_id,
+            lesson=lesson_id,
+            status=status,
+        )
 
-    def get_next_lesson_id(self, part_id, lesson_id):
+    def iter_lessons(self, part_id=None, incomplete=False):
+        """Yield a status row for each lesson in course order.
+
+        Progress and results come from the already loaded state, and the
+        course data is never modified. Rows are dicts with ``part``,
+        ``part_name``, ``lesson``, ``name``, ``status``, ``passing_since``,
+        ``duration`` (seconds the tests took at the last check, if known) and
+        ``flaky`` (whether the last checks disagreed on unchanged files).
+        """
         state = self.load()
-        part = [p for p in state["parts"] if p["id"] == part_id][0]
-        try:
-            lesson = [l for l in part["lessons"] if l["id"] == lesson_id + 1][0]
-            return (part["id"], lesson["id"])
-        except IndexError:
-            try:
-                part = [p for p in state["parts"] if p["id"] == part_id + 1][0]
-                return (part["id"], 1)
-            except IndexError:
-                return None, None
+        progress = state.get("progress", {})
+        results = state.get("results", {})
+        if part_id is None:
+            lesson = self.course.first
+        else:
+            lesson = self.course.first_lesson(part_id)
+        while lesson is not None and (part_id is None or lesson.part.id == part_id):
+            key = "{}.{}".format(lesson.part.id, lesson.id)
+            status = progress.get(key, "incomplete")
+            if not (incomplete and status == "complete"):
+                result = results.get(key)
+                yield {
+                    "part": lesson.part.id,
+                    "part_name": lesson.part.data.get("name", ""),
+                    "lesson": lesson.id,
+                    "name": lesson.data.get("name", ""),
+                    "status": status,
+                    "passing_since": result["since"] if result and result["passed"] else None,
+                    "duration": result["tests"]["duration"] if result and "tests" in result else None,
+                    "flaky": bool(result and result.get("flaky")),
+                }
+            lesson = lesson.next
+
+    def get_lesson_result(self, part_id, lesson_id):
+        """Return the last recorded check result for a lesson, if any."""
+        results_key = "{}.{}".format(part_id, lesson_id)
+        return self.load().get("results", {}).get(results_key)
+
+    def record_lesson_result(self, part_id, lesson_id, digest, passed, tests=None):
+        """Remember the outcome of checking a lesson whose inputs hash to ``digest``.
+
+        ``tests`` is an optional summary of the individual tests (see
+        ``runner.summarize_tests``). Tests whose outcome changed although
+        nothing they depend on did are remembered as ``flaky`` until the
+        lesson's files change.
+        """
+        results_key = "{}.{}".format(part_id, lesson_id)
+        state = self.load()
+        now = datetime.now().isoformat(timespec="seconds")
+        previous = state.get("results", {}).get(results_key)
+        since = now
+        if previous is not None and previous.get("passed") == passed:
+            since = previous.get("since", now)
+        result = {
+            "digest": digest,
+            "passed": passed,
+            "since": since,
+            "checked_at": now,
+        }
+        if tests is not None:
+            result["tests"] = tests
+        if previous is not None and previous.get("digest") == digest:
+            flaky = set(previous.get("flaky", []))
+            if tests is not None and previous.get("tests") is not None:
+                failed = {test["name"] for test in tests["failures"]}
+                failed_before = {test["name"] for test in previous["tests"]["failures"]}
+                flaky |= failed ^ failed_before
+            elif previous.get("passed") != passed:
+                # No per-test results to tell which test flipped.
+                flaky.add("*")
+            if flaky:
+                result["flaky"] = sorted(flaky)
+        state.setdefault("results", {})[results_key] = result
+        self.save(state, changed=[("results", results_key)])
+
+    def get_next_lesson_id(self, part_id, lesson_id):
+        lesson = self.course.get_lesson(part_id, lesson_id)
+        if lesson is None or lesson.next is None:
+            return None, None
+        return lesson.next.key
+
+    def get_first_lesson_id(self, part_id):
+        lesson = self.course.first_lesson(part_id)
+        if lesson is None:
+            return None
+        return lesson.id
 
     def complete_lesson(self, part_id, lesson_id):
         self.set_lesson_status(part_id, lesson_id, "complete")
@@ -98,35 +431,37 @@ class State:
     def get_current_lesson(self):
         part_id = self.get_current_part_id()
         lesson_id = self.get_current_lesson_id()
-        state = self.load()
-        part = [p for p in state["parts"] if p["id"] == part_id][0]
-        lesson = [l for l in part["lessons"] if l["id"] == lesson_id][0]
-        lesson["part"] = part
-        lesson["tutorial_dir"] = state["tutorial_dir"]
-        return lesson
+        lesson = self.course.get_lesson(part_id, lesson_id)
+        if lesson is None:
+            raise click.ClickException(
+                "Current lesson (Part {}, Lesson {}) not found in the tutorial. Run `tutorial sync` if you edited the tutorial config.".format(
+                    part_id, lesson_id
+                )
+            )
+        return dict(lesson.data, part=lesson.part.data, tutorial_dir=self.load()["tutorial_dir"])
 
     def set_current_lesson(self, part_id, lesson_id):
         state = self.load()
-        try:
-            part = [p for p in state["parts"] if p["id"] == part_id][0]
-        except IndexError:
+        if self.course.get_part(part_id) is None:
             raise click.ClickException(
                 "{} is not a valid part ID. See `tutorial status` for a list of parts and lessons.".format(
                     part_id
                 )
             )
-        try:
-            lesson = [l for l in part["lessons"] if l["id"] == lesson_id][0]
-        except IndexError:
+        if self.course.get_lesson(part_id, lesson_id) is None:
             raise click.ClickException(
                 "{} is not a valid lesson ID for part {:02d}. See `tutorial status` for a list of parts and lessons.".format(
                     lesson_id, part_id
                 )
             )
-        state["current"] = {"part": part_id, "lesson": lesson_id}
-        self.save(state)
-        self.set_lesson_status(part_id, lesson_id, "in-progress")
+        progress_key = "{}.{}".format(part_id, lesson_id)
+        current = {"part": part_id, "lesson": lesson_id}
+        started = state.get("current") != current
+        state["current"] = current
+        state["progress"][progress_key] = "in-progress"
+        self.save(state, changed=[("current",), ("progress", progress_key)])
+        if started:
+            EVENTS.emit("lesson_started", part=part_id, lesson=lesson_id)
 
     def list_parts(self):
-        state = self.load()
-        return state["parts"]
+        return self.load_config()["parts"]
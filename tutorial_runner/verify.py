@@ -0,0 +1,170 @@
+"""Whole-course verification: run every lesson's tests against its solution."""
+
+import json
+import shutil
+import tempfile
+import time
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from xml.etree import ElementTree
+
+from tutorial_runner.course import Course
+from tutorial_runner.daemon import preload
+from tutorial_runner.runner import lesson_limits, lesson_selection, pytest_args, run_isolated
+
+IGNORED_FILES = shutil.ignore_patterns("__pycache__", ".pytest_cache", "*.pyc")
+
+
+def lesson_jobs(parts, tutorial_dir):
+    """Describe one verification job per lesson, in course order."""
+    jobs = []
+    lesson = Course(parts).first
+    while lesson is not None:
+        part = lesson.part.data
+        jobs.append(
+            {
+                "part": lesson.part.id,
+                "lesson": lesson.id,
+                "name": lesson.data.get("name", ""),
+                "part_dir": str(Path(tutorial_dir, part["dir"])),
+                "dir": part["dir"],
+                "file": part.get("file"),
+                "test": lesson.data.get("test"),
+                "solution": lesson.data.get("solution"),
+                "limits": lesson_limits(dict(lesson.data, part=part)),
+                "selection": lesson_selection(lesson.data),
+            }
+        )
+        lesson = lesson.next
+    return jobs
+
+
+def run_job(job):
+    """Copy the part into a temporary tree, put the solution in place and run the test."""
+    result = {
+        "part": job["part"],
+        "lesson": job["lesson"],
+        "name": job["name"],
+        "outcome": "skipped",
+        "duration": 0.0,
+        "output": "",
+    }
+    if not (job["test"] and job["solution"] and job["file"]):
+        return result
+    solution = str(Path(job["part_dir"], "solutions", job["solution"]))
+    run, result["output"], result["duration"] = run_in_copy(job, solution)
+    result["outcome"] = "passed" if run.exit_code == 0 else "failed"
+    if run.timed_out:
+        result["output"] += "\nStopped after {} seconds.".format(job["limits"]["timeout"])
+    return result
+
+
+def run_in_copy(job, working_file):
+    """Run a job's test in a temporary copy of its part with ``working_file`` in place.
+
+    Returns the ``RunResult``, the pytest output and the wall time in seconds.
+    """
+    started = time.perf_counter()
+    with tempfile.TemporaryDirectory(prefix="tutorial-verify-") as temp_dir:
+        part_dir = Path(temp_dir, job["dir"])
+        shutil.copytree(job["part_dir"], str(part_dir), ignore=IGNORED_FILES)
+        shutil.copy(working_file, str(part_dir / job["file"]))
+        log_path = Path(temp_dir, "pytest.log")
+        test_path = str(Path(job["dir"], "tests", job["test"]))
+        args = pytest_args(test_path, job.get("selection")) + [
+            "-p",
+            "no:cacheprovider",
+            "--rootdir",
+            temp_dir,
+        ]
+        with open(str(log_path), "w") as log:
+            run = run_isolated(args, cwd=temp_dir, output=log, limits=job["limits"])
+        output = log_path.read_text(errors="replace")
+    return run, output, round(time.perf_counter() - started, 3)
+
+
+def verify(jobs, workers=None, function=run_job):
+    """Run ``jobs`` in a process pool, yielding results as they finish.
+
+    Workers import pytest once up front, so the pytest child forked for
+    each job starts warm.
+    """
+    with ProcessPoolExecutor(max_workers=workers, initializer=preload) as executor:
+        futures = [executor.submit(function, job) for job in jobs]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def workspace_file(workspace, job):
+    """Find a learner's working file for ``job`` in ``workspace``.
+
+    A workspace is either the working file itself, a copy of the tutorial
+    tree or a directory holding the working file directly.
+    """
+    workspace = Path(workspace)
+    if workspace.is_file():
+        return workspace
+    for candidate in (workspace / job["dir"] / job["file"], workspace / job["file"]):
+        if candidate.is_file():
+            return candidate
+    return None
+
+
+def grade_job(job):
+    """Run a lesson's test against the working file in ``job["workspace"]``."""
+    result = {
+        "workspace": job["workspace"],
+        "part": job["part"],
+        "lesson": job["lesson"],
+        "outcome": "missing",
+        "duration": 0.0,
+        "output": "",
+    }
+    working_file = workspace_file(job["workspace"], job)
+    if working_file is None:
+        result["output"] = "No {} found in the workspace.".format(job["file"])
+        return result
+    run, result["output"], result["duration"] = run_in_copy(job, str(working_file))
+    if run.timed_out:
+        result["outcome"] = "timeout"
+    else:
+        result["outcome"] = "passed" if run.exit_code == 0 else "failed"
+    return result
+
+
+def json_report(results):
+    return json.dumps(
+        {
+            "lessons": results,
+            "passed": sum(1 for r in results if r["outcome"] == "passed"),
+            "failed": sum(1 for r in results if r["outcome"] == "failed"),
+            "skipped": sum(1 for r in results if r["outcome"] == "skipped"),
+        },
+        indent=2,
+    )
+
+
+def junit_report(results, suite_name="tutorial"):
+    suite = ElementTree.Element(
+        "testsuite",
+        name=suite_name or "tutorial",
+        tests=str(len(results)),
+        failures=str(sum(1 for r in results if r["outcome"] == "failed")),
+        skipped=str(sum(1 for r in results if r["outcome"] == "skipped")),
+        time="{:.3f}".format(sum(r["duration"] for r in results)),
+    )
+    for result in results:
+        case = ElementTree.SubElement(
+            suite,
+            "testcase",
+            classname="part{:02d}".format(result["part"]),
+            name="lesson{:02d} - {}".format(result["lesson"], result["name"]),
+            time="{:.3f}".format(result["duration"]),
+        )
+        if result["outcome"] == "failed":
+            failure = ElementTree.SubElement(case, "failure", message="Lesson tests failed")
+            failure.text = result["output"]
+        elif result["outcome"] == "skipped":
+            ElementTree.SubElement(case, "skipped", message="No test or solution file")
+    return ElementTree.tostring(suite, encoding="unicode")
@@ -0,0 +1,35 @@
+"""Polling file watcher used by `tutorial watch`."""
+
+import os
+import time
+
+
+def snapshot(paths):
+    """Return the ``(mtime, size)`` of each path, or ``None`` if it is missing."""
+    stats = {}
+    for path in paths:
+        try:
+            stat = os.stat(str(path))
+            stats[path] = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            stats[path] = None
+    return stats
+
+
+def wait_for_change(paths, interval=0.5, debounce=0.3):
+    """Block until one of ``paths`` changes and then stays unchanged for ``debounce`` seconds.
+
+    Only the given files are polled with ``os.stat``, so an idle watcher costs
+    a couple of system calls per ``interval``. Returns the changed paths.
+    """
+    before = snapshot(paths)
+    current = before
+    while current == before:
+        time.sleep(interval)
+        current = snapshot(paths)
+    settled = None
+    while settled != current:
+        settled = current
+        time.sleep(debounce)
+        current = snapshot(paths)
+    return [path for path in paths if current[path] != before[path]]